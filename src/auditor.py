@@ -11,14 +11,23 @@ Key design principle: The auditor runs with NO conversation context
 to minimize prompt injection attack surface.
 """
 
+import hashlib
 import json
-from dataclasses import dataclass
+import re
+from dataclasses import asdict, dataclass, replace
 
+from src import json_codec
+from src.cache import LFUCache
 from src.models import AgentResponse, AgentType
 from src.llm_client import get_client
 
 
-@dataclass
+# Audit results shared across auditor instances, keyed by
+# (exact draft digest, rubric hash)
+_audit_cache = LFUCache(capacity=50_000)
+
+
+@dataclass(slots=True)
 class AcceptedAnswerRubric:
     """Defines what constitutes an acceptable answer."""
     
@@ -85,9 +94,37 @@ class AuditorAgent:
     reduces the attack surface for prompt injection.
     """
     
-    def __init__(self, rubric: AcceptedAnswerRubric = None):
+    def __init__(self, rubric: AcceptedAnswerRubric = None, skip_llm_if_clean: int = 400):
+        """Initialize the auditor.
+        
+        Args:
+            rubric: Acceptance rubric to audit against
+            skip_llm_if_clean: Drafts shorter than this that pass the quick
+                               check and touch no disclaimer topic are approved
+                               without an LLM call (0 disables the fast path)
+        """
         self.client = get_client()
         self.rubric = rubric or AcceptedAnswerRubric()
+        self.skip_llm_if_clean = skip_llm_if_clean
+        
+        # Forbidden phrases and promises compiled into one alternation; the
+        # matching group index maps to a precomputed issue message
+        forbidden = (
+            [(phrase, f"Contains forbidden phrase: '{phrase}'") for phrase in self.rubric.must_not_contain]
+            + [(promise, f"Contains forbidden promise: '{promise}'") for promise in self.rubric.forbidden_promises]
+        )
+        self._forbidden_re = re.compile(
+            "|".join(f"(?P<g{i}>{re.escape(phrase.casefold())})" for i, (phrase, _) in enumerate(forbidden)) or "(?!)"
+        )
+        self._forbidden_issues = [issue for _, issue in forbidden]
+        self._disclaimer_topic_re = re.compile(
+            "|".join(re.escape(topic) for topic in self.rubric.requires_disclaimer_for) or "(?!)",
+            re.IGNORECASE,
+        )
+        self.cache = _audit_cache
+        self.rubric_hash = hashlib.blake2b(
+            repr(sorted(asdict(self.rubric).items())).encode()
+        ).hexdigest()
         
         self.system_prompt = """You are a Quality Assurance Auditor for customer service responses.
 
@@ -115,9 +152,29 @@ Return a JSON object with:
 
 If the response is acceptable, return it unchanged in corrected_response.
 Only make necessary changes - don't over-edit."""
+        
+        self._static_prefix = self._build_static_prefix()
+        
+        # Prompts are frozen once per rubric; only the draft is spliced in
+        self._audit_prompt_template = self._static_prefix.replace("{", "{{").replace("}", "}}") + """
+---DRAFT RESPONSE START---
+{draft}
+---DRAFT RESPONSE END---
+
+Analyze the response and return your assessment as JSON."""
+        self._lightweight_prompt_template = """Quick review of this response:
+
+{draft}
+
+Is this response professional and appropriate? Answer with JSON:
+{{"is_ok": true/false, "issue": "brief issue if any"}}"""
     
-    def _build_audit_prompt(self, draft: str) -> str:
-        """Build the audit prompt with rubric rules."""
+    def _build_static_prefix(self) -> str:
+        """Build the draft-independent head of the audit prompt.
+        
+        The rubric comes before the draft so every audit request shares
+        the same leading tokens, which lets the backend reuse its prefix cache.
+        """
         
         rubric_text = f"""
 QUALITY RUBRIC:
@@ -135,38 +192,28 @@ Topics requiring disclaimer: {', '.join(self.rubric.requires_disclaimer_for)}
 Length limits: {self.rubric.min_length} - {self.rubric.max_length} characters
 """
         
-        return f"""Review this customer service response for quality:
-
----DRAFT RESPONSE START---
-{draft}
----DRAFT RESPONSE END---
-
-{rubric_text}
-
-Analyze the response and return your assessment as JSON."""
+        return f"""Review a customer service response for quality.
+{rubric_text}"""
+    
+    def _build_audit_prompt(self, draft: str) -> str:
+        """Build the audit prompt with rubric rules."""
+        return self._audit_prompt_template.format_map({"draft": draft})
     
     def _quick_check(self, draft: str) -> tuple[bool, list[str]]:
         """Fast deterministic checks before LLM audit."""
         issues = []
         
-        draft_lower = draft.lower()
-        
-        # Check forbidden phrases
-        for phrase in self.rubric.must_not_contain:
-            if phrase.lower() in draft_lower:
-                issues.append(f"Contains forbidden phrase: '{phrase}'")
-        
-        # Check forbidden promises
-        for promise in self.rubric.forbidden_promises:
-            if promise.lower() in draft_lower:
-                issues.append(f"Contains forbidden promise: '{promise}'")
+        # Check forbidden phrases and promises in a single scan
+        matched = {int(m.lastgroup[1:]) for m in self._forbidden_re.finditer(draft.casefold())}
+        issues.extend(self._forbidden_issues[i] for i in sorted(matched))
         
         # Check length
-        if len(draft) < self.rubric.min_length:
-            issues.append(f"Response too short ({len(draft)} chars, min {self.rubric.min_length})")
+        length = len(draft)
+        if length < self.rubric.min_length:
+            issues.append(f"Response too short ({length} chars, min {self.rubric.min_length})")
         
-        if len(draft) > self.rubric.max_length:
-            issues.append(f"Response too long ({len(draft)} chars, max {self.rubric.max_length})")
+        if length > self.rubric.max_length:
+            issues.append(f"Response too long ({length} chars, max {self.rubric.max_length})")
         
         return len(issues) == 0, issues
     
@@ -184,43 +231,111 @@ Analyze the response and return your assessment as JSON."""
         # Quick deterministic checks first
         quick_pass, quick_issues = self._quick_check(draft_response)
         
+        # Short, clean drafts on non-policy topics need no LLM review
+        if self._is_trivially_clean(draft_response, quick_pass):
+            return self._deterministic_audit(draft_response)
+        
+        # Identical drafts get the same verdict, skip the LLM round-trip
+        cache_key = self._cache_key(draft_response)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return self._copy_result(cached)
+        
         # If quick check passes and response looks clean, use a lighter audit
         if quick_pass and len(draft_response) < 800:
             # Lightweight audit - just check for major issues
-            return self._lightweight_audit(draft_response)
+            result = self._lightweight_audit(draft_response)
+        else:
+            # Full LLM audit for longer or potentially problematic responses
+            result = self._full_audit(draft_response, quick_issues)
         
-        # Full LLM audit for longer or potentially problematic responses
-        return self._full_audit(draft_response, quick_issues)
+        self._cache_result(cache_key, result)
+        return result
     
-    def _lightweight_audit(self, draft: str) -> AgentResponse:
-        """Lightweight audit for simple, clean responses."""
+    async def aaudit(self, draft_response: str) -> AgentResponse:
+        """Async variant of audit() that awaits the LLM calls."""
         
-        prompt = f"""Quick review of this response:
-
-{draft}
-
-Is this response professional and appropriate? Answer with JSON:
-{{"is_ok": true/false, "issue": "brief issue if any"}}"""
+        quick_pass, quick_issues = self._quick_check(draft_response)
         
-        response = self.client.generate(
-            prompt=prompt,
-            system_instruction="You are a quick QA checker. Only flag obvious issues.",
-            temperature=0.1,
-            response_format="json"
+        if self._is_trivially_clean(draft_response, quick_pass):
+            return self._deterministic_audit(draft_response)
+        
+        cache_key = self._cache_key(draft_response)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return self._copy_result(cached)
+        
+        if quick_pass and len(draft_response) < 800:
+            result = await self._alightweight_audit(draft_response)
+        else:
+            result = await self._afull_audit(draft_response, quick_issues)
+        
+        self._cache_result(cache_key, result)
+        return result
+    
+    def _is_trivially_clean(self, draft: str, quick_pass: bool) -> bool:
+        """Check whether a draft can be approved without an LLM audit."""
+        return (
+            quick_pass
+            and len(draft) < self.skip_llm_if_clean
+            and not self._disclaimer_topic_re.search(draft)
         )
+    
+    def _deterministic_audit(self, draft: str) -> AgentResponse:
+        """Approve a draft that passed all deterministic checks."""
+        return AgentResponse(
+            content=draft,
+            agent_type=AgentType.AUDITOR,
+            is_valid=True,
+            metadata={"audit_type": "deterministic", "passed": True}
+        )
+    
+    def _cache_key(self, draft: str) -> tuple[bytes, str]:
+        """Build the audit cache key from the exact draft text and rubric.
+        
+        The draft is not normalized: an approved result carries the draft
+        as its content, so only byte-identical drafts may share a verdict.
+        """
+        digest = hashlib.blake2b(draft.encode(), digest_size=16).digest()
+        return digest, self.rubric_hash
+    
+    def _cache_result(self, cache_key: tuple[bytes, str], result: AgentResponse):
+        """Cache a copy of an audit result unless the LLM output could not be parsed."""
+        if not result.metadata.get("parse_error"):
+            self.cache.put(cache_key, self._copy_result(result))
+    
+    @staticmethod
+    def _copy_result(result: AgentResponse) -> AgentResponse:
+        """Copy an audit result so callers never mutate a cached entry."""
+        return replace(
+            result,
+            tool_calls=list(result.tool_calls),
+            metadata=dict(result.metadata),
+            validation_errors=list(result.validation_errors),
+        )
+    
+    def _lightweight_prompt(self, draft: str) -> str:
+        """Build the prompt for the lightweight audit."""
+        return self._lightweight_prompt_template.format_map({"draft": draft})
+    
+    def _parse_lightweight(self, draft: str, response: str) -> tuple[AgentResponse | None, str]:
+        """Parse a lightweight audit result.
         
+        Returns the audited response, or (None, issue) when the draft
+        needs a full audit.
+        """
         try:
-            result = json.loads(response)
+            result = json_codec.loads(response)
             if result.get("is_ok", True):
                 return AgentResponse(
                     content=draft,
                     agent_type=AgentType.AUDITOR,
                     is_valid=True,
                     metadata={"audit_type": "lightweight", "passed": True}
-                )
+                ), ""
             else:
                 # Need full audit
-                return self._full_audit(draft, [result.get("issue", "Flagged in lightweight audit")])
+                return None, result.get("issue", "Flagged in lightweight audit")
         except json.JSONDecodeError:
             # Assume OK if can't parse
             return AgentResponse(
@@ -228,25 +343,53 @@ Is this response professional and appropriate? Answer with JSON:
                 agent_type=AgentType.AUDITOR,
                 is_valid=True,
                 metadata={"audit_type": "lightweight", "parse_error": True}
-            )
+            ), ""
     
-    def _full_audit(self, draft: str, pre_issues: list[str] = None) -> AgentResponse:
-        """Full LLM-based audit with potential corrections."""
+    def _lightweight_audit(self, draft: str) -> AgentResponse:
+        """Lightweight audit for simple, clean responses."""
+        
+        response = self.client.generate(
+            prompt=self._lightweight_prompt(draft),
+            system_instruction="You are a quick QA checker. Only flag obvious issues.",
+            temperature=0.1,
+            response_format="json"
+        )
+        
+        audited, issue = self._parse_lightweight(draft, response)
+        if audited is None:
+            return self._full_audit(draft, [issue])
+        return audited
+    
+    async def _alightweight_audit(self, draft: str) -> AgentResponse:
+        """Async variant of _lightweight_audit()."""
+        
+        response = await self.client.agenerate(
+            prompt=self._lightweight_prompt(draft),
+            system_instruction="You are a quick QA checker. Only flag obvious issues.",
+            temperature=0.1,
+            response_format="json"
+        )
+        
+        audited, issue = self._parse_lightweight(draft, response)
+        if audited is None:
+            return await self._afull_audit(draft, [issue])
+        return audited
+    
+    def _full_audit_prompt(self, draft: str, pre_issues: list[str] = None) -> str:
+        """Build the prompt for the full audit."""
         
         audit_prompt = self._build_audit_prompt(draft)
         
         if pre_issues:
             audit_prompt += f"\n\nPre-identified issues: {', '.join(pre_issues)}"
         
-        response = self.client.generate(
-            prompt=audit_prompt,
-            system_instruction=self.system_prompt,
-            temperature=0.2,
-            response_format="json"
-        )
+        return audit_prompt
+    
+    def _parse_full_audit(self, draft: str, response: str) -> AgentResponse:
+        """Parse a full audit result into an AgentResponse."""
         
         try:
-            result = json.loads(response)
+            result = json_codec.loads(response)
         except json.JSONDecodeError:
             # If we can't parse, return original with warning
             return AgentResponse(
@@ -276,6 +419,30 @@ Is this response professional and appropriate? Answer with JSON:
             }
         )
     
+    def _full_audit(self, draft: str, pre_issues: list[str] = None) -> AgentResponse:
+        """Full LLM-based audit with potential corrections."""
+        
+        response = self.client.generate(
+            prompt=self._full_audit_prompt(draft, pre_issues),
+            system_instruction=self.system_prompt,
+            temperature=0.2,
+            response_format="json"
+        )
+        
+        return self._parse_full_audit(draft, response)
+    
+    async def _afull_audit(self, draft: str, pre_issues: list[str] = None) -> AgentResponse:
+        """Async variant of _full_audit()."""
+        
+        response = await self.client.agenerate(
+            prompt=self._full_audit_prompt(draft, pre_issues),
+            system_instruction=self.system_prompt,
+            temperature=0.2,
+            response_format="json"
+        )
+        
+        return self._parse_full_audit(draft, response)
+    
     def create_fallback_response(self, reason: str = None) -> str:
         """Create a safe fallback response when audit fails completely."""
         
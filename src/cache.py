@@ -0,0 +1,115 @@
+"""In-process caches for expensive LLM and model calls."""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Hashable
+
+
+class LFUCache:
+    """Least-frequently-used cache with LRU tie-breaking.
+    
+    Entries are grouped into buckets by access count; each bucket is an
+    OrderedDict, so eviction drops the least recently used entry among
+    the least frequently used ones. All operations are O(1).
+    
+    With a ``ttl``, entries older than ``ttl`` seconds count as misses;
+    they keep their slot until overwritten or evicted.
+    """
+    
+    def __init__(self, capacity: int = 50_000, ttl: float = None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        
+        self._values: dict[Hashable, Any] = {}
+        self._expires: dict[Hashable, float] = {}
+        self._freq: Counter = Counter()
+        self._buckets: dict[int, OrderedDict] = {}
+        self._min_freq = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values and not self._expired(key)
+    
+    def _expired(self, key: Hashable) -> bool:
+        """Whether a stored entry has outlived the TTL."""
+        return self.ttl is not None and self._expires[key] <= time.monotonic()
+    
+    def _touch(self, key: Hashable):
+        """Move a key to the next frequency bucket."""
+        freq = self._freq[key]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = freq + 1
+        
+        self._freq[key] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value, counting the access as a hit or miss."""
+        with self._lock:
+            if key not in self._values or self._expired(key):
+                self.misses += 1
+                return default
+            
+            self.hits += 1
+            self._touch(key)
+            return self._values[key]
+    
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least frequently used entry if full."""
+        if self.capacity <= 0:
+            return
+        
+        with self._lock:
+            if self.ttl is not None:
+                self._expires[key] = time.monotonic() + self.ttl
+            
+            if key in self._values:
+                self._values[key] = value
+                self._touch(key)
+                return
+            
+            if len(self._values) >= self.capacity:
+                bucket = self._buckets[self._min_freq]
+                evicted, _ = bucket.popitem(last=False)
+                if not bucket:
+                    del self._buckets[self._min_freq]
+                del self._values[evicted]
+                del self._freq[evicted]
+                self._expires.pop(evicted, None)
+            
+            self._values[key] = value
+            self._freq[key] = 1
+            self._buckets.setdefault(1, OrderedDict())[key] = None
+            self._min_freq = 1
+    
+    def clear(self):
+        """Remove all entries and reset statistics."""
+        with self._lock:
+            self._values.clear()
+            self._expires.clear()
+            self._freq.clear()
+            self._buckets.clear()
+            self._min_freq = 0
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> dict:
+        """Get hit/miss statistics for observability."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._values),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
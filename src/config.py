@@ -1,49 +1,63 @@
 """Configuration settings for the reputation-safe agent."""
 
+import functools
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 
+@functools.cache
+def _load_env() -> dict[str, str]:
+    """Load .env once and snapshot the environment."""
+    load_dotenv()
+    return os.environ.copy()
+
+
+def _env(key: str):
+    """Default factory reading a value from the loaded environment."""
+    return field(default_factory=lambda: _load_env().get(key))
+
+
+def _env_int(key: str, default: int):
+    """Default factory reading an integer from the loaded environment."""
+    return field(default_factory=lambda: int(_load_env().get(key) or default))
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Config:
     """Application configuration."""
-    load_dotenv()
     # Gemini API
-    gemini_api_key = os.getenv("gemini_api_key")
-    gemini_model= os.getenv("gemini_model")
+    gemini_api_key: str | None = _env("gemini_api_key")
+    gemini_model: str | None = _env("gemini_model")
     
     # Qdrant Cloud
-    qdrant_url= os.getenv("qdrant_url") 
-    qdrant_api_key = os.getenv("qdrant_api_key") 
-    qdrant_collection = os.getenv("qdrant_collection") 
+    qdrant_url: str | None = _env("qdrant_url")
+    qdrant_api_key: str | None = _env("qdrant_api_key")
+    qdrant_collection: str | None = _env("qdrant_collection")
     
     # Tavily API for web search
-    tavily_api_key= os.getenv("avily_api_key") 
-
+    tavily_api_key: str | None = _env("avily_api_key")
+    
     # Agent settings
     max_retries: int = 3
     temperature: float = 0.7
+    max_concurrent_requests: int = 8
+    
+    # Lifetime in seconds of explicit Gemini context caches holding system
+    # instructions (0 sends them inline on every request)
+    context_cache_ttl: int = _env_int("context_cache_ttl", 0)
     
     # Guardrail settings
-    blocked_terms: list[str] = None
-    required_disclaimers: dict[str, str] = None
-     
-    def __post_init__(self):
-        if self.blocked_terms is None:
-            self.blocked_terms = [
-                "competitor_name",
-                "internal_only",
-                "confidential",
-            ]
-        
-        if self.required_disclaimers is None:
-            self.required_disclaimers = {
-                "refund": "Refund policies are subject to terms and conditions.",
-                "warranty": "Warranty coverage varies by product. Check product documentation for details.",
-                "price": "Prices may vary and are subject to change.",
-            }
+    blocked_terms: list[str] = field(default_factory=lambda: [
+        "competitor_name",
+        "internal_only",
+        "confidential",
+    ])
+    required_disclaimers: dict[str, str] = field(default_factory=lambda: {
+        "refund": "Refund policies are subject to terms and conditions.",
+        "warranty": "Warranty coverage varies by product. Check product documentation for details.",
+        "price": "Prices may vary and are subject to change.",
+    })
 
 
 config = Config()
@@ -4,13 +4,75 @@ These are deterministic rules that run before and after LLM processing
 to ensure safety and compliance.
 """
 
+import functools
 import re
 from dataclasses import dataclass, field
 
-from src.models import GuardrailResult, GuardrailAction
+try:
+    import re2
+except ImportError:
+    re2 = None
 
+from src.models import GuardrailResult, GuardrailAction, ScanMatch, ScanResult
 
-@dataclass
+
+# Keywords for deterministic routing, in priority order. Scanned together
+# with the input guardrail patterns so the supervisor needs no second pass.
+ROUTING_KEYWORDS: dict[str, list[str]] = {
+    "ORDER_AGENT": ["order", "tracking", "shipped", "delivery", "cancel", "status", "ord-"],
+    "PRODUCT_AGENT": ["product", "price", "stock", "available", "buy", "search", "find", "show me", "prod-"],
+    "SUPPORT_AGENT": ["return", "refund", "warranty", "shipping", "payment", "help", "support", "contact"],
+}
+
+
+@functools.cache
+def _compile(pattern: str, flags: int = 0) -> re.Pattern:
+    """Compile a guardrail pattern, shared across guardrail instances.
+    
+    Uses RE2 (linear-time automaton, no backtracking) when google-re2 is
+    installed and the pattern is within its syntax; lookarounds and
+    backreferences fall back to ``re``.
+    """
+    if re2 is not None and flags & ~re.IGNORECASE == 0:
+        try:
+            return re2.compile(("(?i)" if flags else "") + pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern, flags)
+
+
+def _compile_alternation(patterns: list[str], flags: int = 0) -> re.Pattern:
+    """Compile patterns into one alternation with a named group per pattern.
+    
+    The matching pattern's index is recoverable from ``match.lastgroup``
+    (``"g0"``, ``"g1"``, ...), so a single scan replaces one scan per pattern.
+    An empty list compiles to a pattern that never matches.
+    """
+    if not patterns:
+        return _compile(r"(?!)")
+    return _compile(
+        "|".join(f"(?P<g{i}>{p})" for i, p in enumerate(patterns)),
+        flags,
+    )
+
+
+def _compile_overlapping(patterns: list[str], flags: int = 0) -> re.Pattern:
+    """Compile patterns into a zero-width alternation reporting every start.
+    
+    Unlike ``_compile_alternation``, matches do not consume input, so
+    ``finditer`` reports a hit at every position where some pattern matches
+    (the first one in list order wins at each position); the matched span
+    is ``match.span(match.lastgroup)``.
+    """
+    if not patterns:
+        return _compile(r"(?!)")
+    return _compile(
+        "(?=(?:" + "|".join(f"(?P<g{i}>{p})" for i, p in enumerate(patterns)) + "))",
+        flags,
+    )
+
+
+@dataclass(slots=True)
 class InputGuardrail:
     """Deterministic input guardrail that screens user messages before processing."""
     
@@ -39,48 +101,89 @@ class InputGuardrail:
         "lawsuit",
     ])
     
+    # Keywords per route for deterministic routing
+    routing_keywords: dict[str, list[str]] = field(
+        default_factory=lambda: {route: list(kws) for route, kws in ROUTING_KEYWORDS.items()}
+    )
+    
+    # All pattern lists compiled once per instance into a single scan;
+    # _scan_index maps each group index to its (category, payload)
+    _scan_re: re.Pattern = field(init=False, repr=False)
+    _scan_index: list[tuple[str, str]] = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        entries = (
+            [(p, "injection", p) for p in self.blocked_patterns]
+            + [(p, "abuse", p) for p in self.abuse_patterns]
+            + [(re.escape(intent), "high_risk", intent) for intent in self.high_risk_intents]
+            + [
+                (re.escape(kw), "route", route)
+                for route, kws in self.routing_keywords.items()
+                for kw in kws
+            ]
+        )
+        self._scan_re = _compile_overlapping([pattern for pattern, _, _ in entries])
+        self._scan_index = [(category, payload) for _, category, payload in entries]
+    
+    def scan(self, user_input: str) -> ScanResult:
+        """Run every deterministic pattern over the input in a single pass."""
+        matches = []
+        for match in self._scan_re.finditer(user_input.lower()):
+            group = match.lastgroup
+            category, payload = self._scan_index[int(group[1:])]
+            start, end = match.span(group)
+            matches.append(ScanMatch(start, end, category, payload))
+        return ScanResult(matches=matches)
+    
     def check(self, user_input: str) -> GuardrailResult:
-        """Check user input against guardrail rules."""
-        input_lower = user_input.lower()
-        
-        # Check for prompt injection attempts
-        for pattern in self.blocked_patterns:
-            if re.search(pattern, input_lower):
-                return GuardrailResult(
-                    action=GuardrailAction.BLOCK,
-                    original_content=user_input,
-                    reason="Potential prompt injection detected",
-                    flags=["prompt_injection"]
-                )
+        """Check user input against guardrail rules.
+        
+        The scan result is attached as ``metadata["prescan"]`` so later
+        stages (e.g. supervisor routing) can reuse it.
+        """
+        scan = self.scan(user_input)
+        metadata = {"prescan": scan}
+        
+        # Check for prompt injection
+        if scan.has("injection"):
+            return GuardrailResult(
+                action=GuardrailAction.BLOCK,
+                original_content=user_input,
+                reason="Potential prompt injection detected",
+                flags=["prompt_injection"],
+                metadata=metadata,
+            )
         
         # Check for abusive content
-        for pattern in self.abuse_patterns:
-            if re.search(pattern, input_lower):
-                return GuardrailResult(
-                    action=GuardrailAction.FLAG,
-                    original_content=user_input,
-                    reason="Potentially abusive content detected",
-                    flags=["abuse"]
-                )
+        if scan.has("abuse"):
+            return GuardrailResult(
+                action=GuardrailAction.FLAG,
+                original_content=user_input,
+                reason="Potentially abusive content detected",
+                flags=["abuse"],
+                metadata=metadata,
+            )
         
         # Check for high-risk intents
-        for intent in self.high_risk_intents:
-            if intent in input_lower:
-                return GuardrailResult(
-                    action=GuardrailAction.FLAG,
-                    original_content=user_input,
-                    reason=f"High-risk intent detected: {intent}",
-                    flags=["high_risk", "legal"]
-                )
+        high_risk = scan.of("high_risk")
+        if high_risk:
+            return GuardrailResult(
+                action=GuardrailAction.FLAG,
+                original_content=user_input,
+                reason=f"High-risk intent detected: {high_risk[0].payload}",
+                flags=["high_risk", "legal"],
+                metadata=metadata,
+            )
         
         # Input is clean
         return GuardrailResult(
             action=GuardrailAction.ALLOW,
-            original_content=user_input
+            original_content=user_input,
+            metadata=metadata,
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class OutputGuardrail:
     """Deterministic output guardrail that enforces constraints on agent responses."""
     
@@ -109,34 +212,67 @@ class OutputGuardrail:
     # Maximum response length
     max_length: int = 2000
     
+    # Blocked terms, PII patterns and disclaimer triggers combined into one
+    # substitution pass; replacement chosen by group (None keeps the match)
+    _redaction_re: re.Pattern = field(init=False, repr=False)
+    _replacements: list[str | None] = field(init=False, repr=False)
+    _term_re: re.Pattern = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self._redaction_re = _compile_alternation(
+            [re.escape(term) for term in self.blocked_terms]
+            + list(self.pii_patterns)
+            + [re.escape(trigger) for trigger in self.disclaimer_triggers],
+            re.IGNORECASE,
+        )
+        self._replacements = (
+            ["[REMOVED]"] * len(self.blocked_terms)
+            + list(self.pii_patterns.values())
+            + [None] * len(self.disclaimer_triggers)
+        )
+        self._term_re = _compile_alternation(
+            [re.escape(term) for term in self.blocked_terms],
+            re.IGNORECASE,
+        )
+    
+    def stream_checker(self) -> "StreamChecker":
+        """Create an incremental blocked-term checker for streamed output."""
+        return StreamChecker(self._term_re, self.blocked_terms)
+    
     def check(self, output: str) -> GuardrailResult:
         """Check and potentially modify output against guardrail rules."""
-        modified = output
         flags = []
-        modifications_made = False
-        
-        # Check for blocked terms
-        for term in self.blocked_terms:
-            if term.lower() in modified.lower():
-                # Instead of blocking, remove the term
-                pattern = re.compile(re.escape(term), re.IGNORECASE)
-                modified = pattern.sub("[REMOVED]", modified)
-                flags.append(f"removed_term:{term}")
-                modifications_made = True
-        
-        # Redact PII
-        for pattern, replacement in self.pii_patterns.items():
-            if re.search(pattern, modified):
-                modified = re.sub(pattern, replacement, modified)
+        
+        # Remove blocked terms, redact PII and find disclaimer triggers in a
+        # single case-insensitive pass, without building lowercased copies
+        matched = set()
+        
+        def _replace(match: re.Match) -> str:
+            index = int(match.lastgroup[1:])
+            matched.add(index)
+            replacement = self._replacements[index]
+            return match.group() if replacement is None else replacement
+        
+        modified = self._redaction_re.sub(_replace, output)
+        
+        num_terms = len(self.blocked_terms)
+        num_redactions = num_terms + len(self.pii_patterns)
+        for index in sorted(matched):
+            if index < num_terms:
+                flags.append(f"removed_term:{self.blocked_terms[index]}")
+            elif index < num_redactions:
                 flags.append("pii_redacted")
-                modifications_made = True
         
         # Add required disclaimers
-        for trigger, disclaimer in self.disclaimer_triggers.items():
-            if trigger.lower() in modified.lower() and disclaimer not in modified:
-                modified = modified + disclaimer
+        disclaimers = []
+        for index, (trigger, disclaimer) in enumerate(self.disclaimer_triggers.items(), num_redactions):
+            if index in matched and disclaimer not in modified:
+                disclaimers.append(disclaimer)
                 flags.append(f"disclaimer_added:{trigger}")
-                modifications_made = True
+        if disclaimers:
+            modified = modified + "".join(disclaimers)
+        
+        modifications_made = bool(flags)
         
         # Truncate if too long
         if len(modified) > self.max_length:
@@ -159,6 +295,35 @@ class OutputGuardrail:
         )
 
 
+class StreamChecker:
+    """Incremental blocked-term scanner for output that arrives in chunks.
+    
+    Keeps the last (longest term - 1) characters between chunks, so a term
+    split across a chunk boundary is still found, and each hit is reported
+    exactly once.
+    """
+    
+    def __init__(self, pattern: re.Pattern, terms: list[str]):
+        self._pattern = pattern
+        self._terms = terms
+        self._overlap = max((len(term) for term in terms), default=1) - 1
+        self._tail = ""
+    
+    def feed(self, chunk: str) -> list[str]:
+        """Scan the next chunk and return any blocked terms it completes."""
+        window = self._tail + chunk
+        tail_length = len(self._tail)
+        
+        hits = [
+            self._terms[int(m.lastgroup[1:])]
+            for m in self._pattern.finditer(window)
+            if m.end() > tail_length
+        ]
+        
+        self._tail = window[-self._overlap:] if self._overlap else ""
+        return hits
+
+
 class ContentFilter:
     """Additional content filtering utilities."""
     
@@ -0,0 +1,67 @@
+"""JSON encoding/decoding for LLM payloads.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. orjson.JSONDecodeError subclasses json.JSONDecodeError, so
+callers catch ``json.JSONDecodeError`` either way.
+
+Large payloads (such as full audit results) are parsed with simdjson
+when it is installed.
+
+``dumps`` produces compact JSON for prompts: no indentation or spaces
+after separators, non-ASCII text kept as is, and unknown types rendered
+with ``str``.
+"""
+
+import json
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+
+# Payloads at least this many bytes long go through simdjson
+SIMDJSON_THRESHOLD = 512
+
+# simdjson parsers reuse internal buffers and are not thread-safe
+_local = threading.local()
+
+
+def _simdjson_parser():
+    """Get this thread's simdjson parser."""
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = simdjson.Parser()
+    return parser
+
+
+def _loads_small(data: str | bytes):
+    """Parse with orjson or the standard library."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def loads(data: str | bytes):
+    """Parse a JSON document."""
+    if simdjson is not None and len(data) >= SIMDJSON_THRESHOLD:
+        raw = data.encode() if isinstance(data, str) else data
+        try:
+            return _simdjson_parser().parse(raw, recursive=True)
+        except ValueError:
+            # Re-parse so callers get a json.JSONDecodeError
+            pass
+    return _loads_small(data)
+
+
+def dumps(obj) -> str:
+    """Serialize an object to compact JSON text."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
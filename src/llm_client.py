@@ -1,41 +1,231 @@
 """LLM Client wrapper for Google Gemini."""
 
+import asyncio
 import json
-from typing import Any
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Iterator
 
+import httpx
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 
+from src import json_codec
 from src.config import config
 
 
+# HTTP/2 multiplexes concurrent requests over one connection; it needs the
+# optional h2 package
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+
+# LLM calls regularly outlast httpx's 5 second default
+HTTP_TIMEOUT = 60.0
+
+
+def _pool_limits() -> httpx.Limits:
+    """Connection pool limits for the Gemini HTTP clients."""
+    return httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+
 class GeminiClient:
     """Wrapper for Google Gemini API."""
     
-    def __init__(self, api_key: str = None, model: str = None):
+    def __init__(self, api_key: str = None, model: str = None, context_cache_ttl: int = None):
+        """Initialize the client.
+        
+        Args:
+            api_key: Gemini API key (uses config if not provided)
+            model: Model name (uses config if not provided)
+            context_cache_ttl: Lifetime in seconds of context caches holding
+                               system instructions; 0 sends them inline
+                               (uses config if not provided)
+        """
         self.api_key = api_key or config.gemini_api_key
         self.model = model or config.gemini_model
-        self.client = genai.Client(api_key=self.api_key)
+        self.context_cache_ttl = (
+            config.context_cache_ttl if context_cache_ttl is None else context_cache_ttl
+        )
+        
+        # Sync and async clients with persistent connection pools, so the
+        # supervisor, sub-agents and auditor (which share this client)
+        # reuse keep-alive connections instead of new TLS handshakes
+        self.client = genai.Client(
+            api_key=self.api_key,
+            http_options=types.HttpOptions(
+                httpx_client=httpx.Client(
+                    http2=HTTP2, limits=_pool_limits(), timeout=HTTP_TIMEOUT
+                ),
+            ),
+        )
+        
+        # One async client per event loop (an async connection pool is bound
+        # to the loop that opened it) and one semaphore per event loop to
+        # cap in-flight requests; both go away with their loop
+        self._aclients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        
+        # Context caches by system instruction: (cached content name or
+        # None if it could not be cached, monotonic renewal time)
+        self._context_caches: dict[str, tuple[str | None, float]] = {}
+        self._context_caches_lock = threading.Lock()
     
-    def generate(
+    @property
+    def aclient(self) -> genai.Client:
+        """The async-capable client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        aclient = self._aclients.get(loop)
+        if aclient is None:
+            aclient = genai.Client(
+                api_key=self.api_key,
+                http_options=types.HttpOptions(
+                    httpx_async_client=httpx.AsyncClient(
+                        http2=HTTP2, limits=_pool_limits(), timeout=HTTP_TIMEOUT
+                    ),
+                ),
+            )
+            self._aclients[loop] = aclient
+        return aclient
+    
+    def _cached_context(self, system_instruction: str | None) -> tuple[bool, str | None]:
+        """Look up a live context cache entry for a system instruction.
+        
+        Returns:
+            Tuple of (whether an entry is usable, cached content name or
+            None to send the instruction inline)
+        """
+        if not self.context_cache_ttl or not system_instruction:
+            return True, None
+        
+        entry = self._context_caches.get(system_instruction)
+        if entry is not None and entry[1] > time.monotonic():
+            return True, entry[0]
+        return False, None
+    
+    def _context_cache_config(self, system_instruction: str) -> types.CreateCachedContentConfig:
+        """Config for a context cache holding a system instruction."""
+        return types.CreateCachedContentConfig(
+            system_instruction=system_instruction,
+            ttl=f"{self.context_cache_ttl}s",
+        )
+    
+    def _store_context_cache(self, system_instruction: str, name: str | None):
+        """Remember a context cache, renewing it before the API expires it."""
+        with self._context_caches_lock:
+            self._context_caches[system_instruction] = (
+                name, time.monotonic() + self.context_cache_ttl * 0.9
+            )
+    
+    def _context_cache(self, system_instruction: str | None) -> str | None:
+        """Get the context cache holding a system instruction.
+        
+        When ``context_cache_ttl`` is set, each distinct system instruction
+        is uploaded once as cached content and later requests reference it
+        instead of resending the text. Instructions the API refuses to cache
+        (e.g. below the model's minimum token count) are sent inline until
+        the TTL has passed. Concurrent first requests may each create a
+        cache; the last one stored is used and the others expire unused.
+        
+        Returns:
+            The cached content name, or None to send the instruction inline
+        """
+        found, name = self._cached_context(system_instruction)
+        if found:
+            return name
+        
+        try:
+            name = self.client.caches.create(
+                model=self.model,
+                config=self._context_cache_config(system_instruction),
+            ).name
+        except errors.APIError:
+            name = None
+        
+        self._store_context_cache(system_instruction, name)
+        return name
+    
+    async def _acontext_cache(self, system_instruction: str | None) -> str | None:
+        """Async variant of _context_cache() that does not block the event loop."""
+        found, name = self._cached_context(system_instruction)
+        if found:
+            return name
+        
+        try:
+            cached = await self.aclient.aio.caches.create(
+                model=self.model,
+                config=self._context_cache_config(system_instruction),
+            )
+            name = cached.name
+        except errors.APIError:
+            name = None
+        
+        self._store_context_cache(system_instruction, name)
+        return name
+    
+    def _build_config(
         self,
-        prompt: str,
         system_instruction: str = None,
         temperature: float = None,
         max_tokens: int = 2048,
-        response_format: str = "text"  # "text" or "json"
-    ) -> str:
-        """Generate a response from the model."""
+        response_format: str = "text",
+        response_schema: type | dict = None,
+        cached_content: str = None,
+    ) -> types.GenerateContentConfig:
+        """Build the generation config shared by sync and async calls.
+        
+        ``cached_content`` names a context cache holding the system
+        instruction, which is then not sent inline.
+        """
         
         generation_config = types.GenerateContentConfig(
             temperature=temperature or config.temperature,
             max_output_tokens=max_tokens,
-            system_instruction=system_instruction,
+            system_instruction=None if cached_content else system_instruction,
+            cached_content=cached_content,
         )
         
-        if response_format == "json":
+        if response_format == "json" or response_schema is not None:
             generation_config.response_mime_type = "application/json"
         
+        if response_schema is not None:
+            generation_config.response_schema = response_schema
+        
+        return generation_config
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the concurrency semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(config.max_concurrent_requests)
+            self._semaphores[loop] = semaphore
+        return semaphore
+    
+    def generate(
+        self,
+        prompt: str,
+        system_instruction: str = None,
+        temperature: float = None,
+        max_tokens: int = 2048,
+        response_format: str = "text",  # "text" or "json"
+        response_schema: type | dict = None,
+    ) -> str:
+        """Generate a response from the model."""
+        
+        generation_config = self._build_config(
+            system_instruction=system_instruction,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format,
+            response_schema=response_schema,
+            cached_content=self._context_cache(system_instruction),
+        )
+        
         response = self.client.models.generate_content(
             model=self.model,
             contents=prompt,
@@ -44,6 +234,100 @@ class GeminiClient:
         
         return response.text
     
+    def generate_stream(
+        self,
+        prompt: str,
+        system_instruction: str = None,
+        temperature: float = None,
+        max_tokens: int = 2048,
+    ) -> Iterator[str]:
+        """Stream a response from the model chunk by chunk.
+        
+        Closing the generator early closes the underlying HTTP stream, so
+        the model stops producing (and billing) further output tokens.
+        """
+        
+        generation_config = self._build_config(
+            system_instruction=system_instruction,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            cached_content=self._context_cache(system_instruction),
+        )
+        
+        stream = self.client.models.generate_content_stream(
+            model=self.model,
+            contents=prompt,
+            config=generation_config,
+        )
+        
+        try:
+            for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+        finally:
+            stream.close()
+    
+    async def agenerate(
+        self,
+        prompt: str,
+        system_instruction: str = None,
+        temperature: float = None,
+        max_tokens: int = 2048,
+        response_format: str = "text",  # "text" or "json"
+        response_schema: type | dict = None,
+    ) -> str:
+        """Generate a response from the model without blocking the event loop."""
+        
+        generation_config = self._build_config(
+            system_instruction=system_instruction,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format,
+            response_schema=response_schema,
+            cached_content=await self._acontext_cache(system_instruction),
+        )
+        
+        async with self._get_semaphore():
+            response = await self.aclient.aio.models.generate_content(
+                model=self.model,
+                contents=prompt,
+                config=generation_config,
+            )
+        
+        return response.text
+    
+    async def agenerate_stream(
+        self,
+        prompt: str,
+        system_instruction: str = None,
+        temperature: float = None,
+        max_tokens: int = 2048,
+    ) -> AsyncIterator[str]:
+        """Async variant of generate_stream().
+        
+        Closing the generator early (``aclose()``) closes the HTTP stream.
+        """
+        
+        generation_config = self._build_config(
+            system_instruction=system_instruction,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            cached_content=await self._acontext_cache(system_instruction),
+        )
+        
+        async with self._get_semaphore():
+            stream = await self.aclient.aio.models.generate_content_stream(
+                model=self.model,
+                contents=prompt,
+                config=generation_config,
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.text:
+                        yield chunk.text
+            finally:
+                await stream.aclose()
+    
     def generate_with_history(
         self,
         messages: list[dict],
@@ -52,11 +336,13 @@ class GeminiClient:
     ) -> str:
         """Generate a response with conversation history."""
         
-        # Build the full prompt with history
-        history_text = ""
-        for msg in messages[:-1]:  # All but last message
-            role = "User" if msg["role"] == "user" else "Assistant"
-            history_text += f"{role}: {msg['content']}\n\n"
+        # Build the full prompt with history in a single join. Earlier turns
+        # always render to the same bytes, so the prompt prefix stays stable
+        # across turns and can hit the backend's prefix cache.
+        history_text = "".join(
+            f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}\n\n"
+            for msg in messages[:-1]  # All but last message
+        )
         
         current_message = messages[-1]["content"] if messages else ""
         
@@ -76,44 +362,48 @@ Please respond to the current user message, taking into account the conversation
     def generate_structured(
         self,
         prompt: str,
-        schema: dict[str, Any],
+        schema: type | dict[str, Any],
         system_instruction: str = None,
     ) -> dict:
-        """Generate a structured JSON response matching the schema."""
+        """Generate a structured JSON response matching the schema.
         
-        schema_str = json.dumps(schema, indent=2)
-        structured_prompt = f"""{prompt}
-
-Please respond with a JSON object matching this schema:
-{schema_str}
-
-Respond ONLY with valid JSON, no additional text."""
+        The schema is enforced by the model through response_schema, so it
+        is not repeated in the prompt and the output is always valid JSON.
+        """
         
         response_text = self.generate(
-            prompt=structured_prompt,
+            prompt=prompt,
             system_instruction=system_instruction,
-            response_format="json",
+            response_schema=schema,
             temperature=0.3,  # Lower temperature for structured output
         )
         
         try:
-            return json.loads(response_text)
+            return json_codec.loads(response_text)
         except json.JSONDecodeError:
-            # Try to extract JSON from the response
-            import re
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
             raise ValueError(f"Could not parse JSON from response: {response_text}")
 
 
-# Singleton instance
+# Process-wide client shared by the supervisor, sub-agents and auditor
 _client: GeminiClient | None = None
+_client_lock = threading.Lock()
 
 
 def get_client() -> GeminiClient:
-    """Get or create the Gemini client instance."""
+    """Get or create the shared Gemini client instance."""
     global _client
     if _client is None:
-        _client = GeminiClient()
+        with _client_lock:
+            if _client is None:
+                _client = GeminiClient()
     return _client
+
+
+def close_all():
+    """Close and forget the shared client (used for test teardown)."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    
+    if client is not None:
+        client.client.close()
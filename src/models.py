@@ -1,10 +1,17 @@
 """Data models for the agent system."""
 
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
+from itertools import islice
 from typing import Any
 
 
+# Joins the fields of Product search text; it never occurs in product data,
+# so no substring without it can match across two fields
+SEARCH_TEXT_SEPARATOR = "\x1f"
+
+
 class AgentType(Enum):
     """Types of agents in the system."""
     SUPERVISOR = "supervisor"
@@ -22,7 +29,7 @@ class GuardrailAction(Enum):
     FLAG = "flag"
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """A single message in the conversation."""
     role: str  # "user" or "assistant"
@@ -30,11 +37,29 @@ class Message:
     metadata: dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class ConversationMemory:
-    """Stores conversation history."""
-    messages: list[Message] = field(default_factory=list)
+    """Stores conversation history.
+    
+    Only the most recent ``max_messages`` messages are kept; older ones
+    are dropped as new ones are added.
+    """
+    messages: deque[Message] = field(default_factory=deque)
     context: dict[str, Any] = field(default_factory=dict)
+    max_messages: int = 64
+    
+    # Messages in prompt format, appended alongside messages
+    _as_dicts: deque[dict] = field(default_factory=deque, init=False, repr=False)
+    
+    # Histories by max_turns, dropped whenever a message is added
+    _history_cache: dict[int, list[dict]] = field(default_factory=dict, init=False, repr=False)
+    
+    def __post_init__(self):
+        self.messages = deque(self.messages, maxlen=self.max_messages)
+        self._as_dicts = deque(
+            ({"role": m.role, "content": m.content} for m in self.messages),
+            maxlen=self.max_messages,
+        )
     
     def add_message(self, role: str, content: str, metadata: dict = None):
         self.messages.append(Message(
@@ -42,11 +67,22 @@ class ConversationMemory:
             content=content,
             metadata=metadata or {}
         ))
+        self._as_dicts.append({"role": role, "content": content})
+        self._history_cache.clear()
     
     def get_history(self, max_turns: int = 10) -> list[dict]:
-        """Get recent conversation history."""
-        recent = self.messages[-max_turns * 2:] if len(self.messages) > max_turns * 2 else self.messages
-        return [{"role": m.role, "content": m.content} for m in recent]
+        """Get recent conversation history.
+        
+        The returned list is cached until the next message is added and is
+        shared between callers, so it must not be modified.
+        """
+        history = self._history_cache.get(max_turns)
+        if history is None:
+            # Walk back from the newest message, so the cost is O(max_turns)
+            history = list(islice(reversed(self._as_dicts), max_turns * 2))
+            history.reverse()
+            self._history_cache[max_turns] = history
+        return history
     
     def set_context(self, key: str, value: Any):
         self.context[key] = value
@@ -55,7 +91,7 @@ class ConversationMemory:
         return self.context.get(key, default)
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolCall:
     """Represents a tool/function call."""
     name: str
@@ -63,7 +99,7 @@ class ToolCall:
     result: Any = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentResponse:
     """Response from an agent."""
     content: str
@@ -74,7 +110,7 @@ class AgentResponse:
     validation_errors: list[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class GuardrailResult:
     """Result from a guardrail check."""
     action: GuardrailAction
@@ -82,9 +118,33 @@ class GuardrailResult:
     modified_content: str | None = None
     reason: str = ""
     flags: list[str] = field(default_factory=list)
+    metadata: dict[str, Any] = field(default_factory=dict)
+
 
+@dataclass(slots=True)
+class ScanMatch:
+    """A single hit from the deterministic input scan."""
+    start: int
+    end: int
+    category: str  # "injection", "abuse", "high_risk" or "route"
+    payload: str  # Matched pattern, intent or route name
 
-@dataclass
+
+@dataclass(slots=True)
+class ScanResult:
+    """All deterministic hits from one pass over a user message."""
+    matches: list[ScanMatch] = field(default_factory=list)
+    
+    def of(self, category: str) -> list[ScanMatch]:
+        """Get the matches of one category, in input order."""
+        return [m for m in self.matches if m.category == category]
+    
+    def has(self, category: str) -> bool:
+        """Check whether any match of the category was found."""
+        return any(m.category == category for m in self.matches)
+
+
+@dataclass(slots=True)
 class Order:
     """Mock order data."""
     order_id: str
@@ -95,7 +155,7 @@ class Order:
     tracking_number: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     """Mock product data."""
     product_id: str
@@ -105,3 +165,12 @@ class Product:
     category: str
     in_stock: bool = True
     specs: dict[str, Any] = field(default_factory=dict)
+    
+    # Lower-cased search fields, derived once at construction; name and
+    # description share one string so a substring check is a single scan
+    _search_text: str = field(init=False, repr=False, compare=False)
+    _category_lower: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._search_text = f"{self.name.lower()}{SEARCH_TEXT_SEPARATOR}{self.description.lower()}"
+        self._category_lower = self.category.lower()
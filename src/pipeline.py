@@ -7,6 +7,11 @@ This module implements the full pipeline from the article:
 4. Output Guardrail - Final deterministic checks
 """
 
+import asyncio
+import copy
+import hashlib
+import threading
+import time
 from dataclasses import dataclass, field
 from typing import Callable
 
@@ -18,12 +23,17 @@ from src.models import (
     GuardrailResult,
 )
 from src.guardrails import InputGuardrail, OutputGuardrail
-from src.supervisor import SupervisorAgent
+from src.supervisor import LIVE_DATA_AGENTS, SupervisorAgent
 from src.auditor import AuditorAgent, AcceptedAnswerRubric
+from src.cache import LFUCache
 from src.config import config
 
 
-@dataclass
+# Tools with side effects; responses that used them are never cached
+STATEFUL_TOOLS = {"cancel_order", "create_support_ticket"}
+
+
+@dataclass(slots=True)
 class PipelineResult:
     """Result from the full pipeline execution."""
     
@@ -44,6 +54,19 @@ class PipelineResult:
     
     # Timing (would be populated in real system)
     latency_ms: float = 0.0
+    
+    # Served from the response cache without running the agents
+    from_cache: bool = False
+
+
+def _warm_embedder():
+    """Load the RAG embedding model ahead of the first product search."""
+    try:
+        from src.rag import get_rag
+        get_rag().warm()
+    except Exception:
+        # RAG is optional, product tools work without it
+        pass
 
 
 class ReputationSafeAgentPipeline:
@@ -85,6 +108,13 @@ class ReputationSafeAgentPipeline:
         custom_rubric: AcceptedAnswerRubric = None,
         on_block_callback: Callable[[str, str], None] = None,
         on_flag_callback: Callable[[str, list[str]], None] = None,
+        speculative_retries: bool = False,
+        parallel_drafts: int = 1,
+        response_cache_capacity: int = 50_000,
+        response_cache_ttl: float = 300.0,
+        fast_routing: bool = False,
+        stop_on_blocked_terms: bool = False,
+        warm_embedder: bool = False,
     ):
         """Initialize the pipeline.
         
@@ -93,14 +123,44 @@ class ReputationSafeAgentPipeline:
             custom_rubric: Custom acceptance rubric for auditor
             on_block_callback: Called when input is blocked (message, reason)
             on_flag_callback: Called when content is flagged (message, flags)
+            speculative_retries: In aprocess(), draft the next retry while the
+                                 auditor reviews the current one (lower retry
+                                 latency at the cost of extra LLM calls)
+            parallel_drafts: In aprocess(), number of drafts to generate and
+                             audit at once, keeping the first that passes
+                             (up to max_retries + 1; 1 disables racing)
+            response_cache_capacity: Maximum number of cached responses for
+                                     repeated messages (0 disables the cache)
+            response_cache_ttl: Seconds a cached response is reused before
+                                the agents run again for the message
+            fast_routing: Skip the LLM router for messages whose keywords
+                          clearly point to a single specialist
+            stop_on_blocked_terms: Stream the composed response and stop
+                                   generating at the first blocked term,
+                                   saving output tokens; the reply then ends
+                                   at that term (redacted) instead of being
+                                   complete
+            warm_embedder: Load the RAG embedding model in a background
+                           thread now, instead of on the first product
+                           search that falls back to RAG
         """
         self.max_retries = max_retries or config.max_retries
+        self.speculative_retries = speculative_retries
+        self.parallel_drafts = parallel_drafts
         
         # Initialize components
         self.input_guardrail = InputGuardrail()
         self.output_guardrail = OutputGuardrail()
-        self.supervisor = SupervisorAgent()
+        self.supervisor = SupervisorAgent(
+            stream_checker_factory=self.output_guardrail.stream_checker if stop_on_blocked_terms else None,
+            fast_routing=fast_routing,
+        )
         self.auditor = AuditorAgent(rubric=custom_rubric)
+        self.response_cache = LFUCache(capacity=response_cache_capacity, ttl=response_cache_ttl)
+        
+        # Load the embedding model off the request path
+        if warm_embedder:
+            threading.Thread(target=_warm_embedder, name="embedder-warmup", daemon=True).start()
         
         # Callbacks for monitoring/alerting
         self.on_block = on_block_callback
@@ -136,17 +196,24 @@ class ReputationSafeAgentPipeline:
         # Continue with normal processing
         return None
     
-    def process(self, user_message: str) -> PipelineResult:
+    def process(self, user_message: str, stateless: bool = False) -> PipelineResult:
         """Process a user message through the full pipeline.
         
         Args:
             user_message: The user's input message
+            stateless: Process the message as a one-off request that neither
+                       reads nor updates the conversation history
             
         Returns:
             PipelineResult with the response and execution details
         """
-        import time
-        start_time = time.time()
+        start_time = time.perf_counter()
+        result = self._process(user_message, stateless)
+        result.latency_ms = (time.perf_counter() - start_time) * 1000
+        return result
+    
+    def _process(self, user_message: str, stateless: bool) -> PipelineResult:
+        """Run the pipeline stages for process()."""
         
         # ============================================
         # STEP 1: Input Guardrail
@@ -154,14 +221,20 @@ class ReputationSafeAgentPipeline:
         input_result = self.input_guardrail.check(user_message)
         
         if input_result.action == GuardrailAction.BLOCK:
-            result = self._handle_blocked_input(input_result)
-            result.latency_ms = (time.time() - start_time) * 1000
-            return result
+            return self._handle_blocked_input(input_result)
         
         if input_result.action == GuardrailAction.FLAG:
             self._handle_flagged_input(input_result, user_message)
             # Continue processing but with awareness
         
+        # Same message in the same conversation state, skip the agents
+        cache_key = None
+        if input_result.action == GuardrailAction.ALLOW:
+            cache_key = self._response_cache_key(user_message, stateless)
+            cached = self._cached_result(cache_key, user_message, stateless)
+            if cached is not None:
+                return cached
+        
         # ============================================
         # STEP 2: Supervisor Processing
         # ============================================
@@ -171,7 +244,11 @@ class ReputationSafeAgentPipeline:
         
         while retries <= self.max_retries:
             # Get supervisor response
-            supervisor_response = self.supervisor.process(user_message)
+            supervisor_response = self.supervisor.process(
+                user_message,
+                ConversationMemory() if stateless else None,
+                input_result.metadata.get("prescan"),
+            )
             
             # ============================================
             # STEP 3: Auditor Review
@@ -192,6 +269,249 @@ class ReputationSafeAgentPipeline:
                 # Auditor made corrections but doesn't require retry
                 break
         
+        result = self._finalize(
+            input_result, supervisor_response, auditor_response, retries
+        )
+        self._store_result(cache_key, result, stateless)
+        return result
+    
+    async def aprocess(self, user_message: str, stateless: bool = False) -> PipelineResult:
+        """Async variant of process() so independent messages can overlap.
+        
+        Args:
+            user_message: The user's input message
+            stateless: Process the message as a one-off request that neither
+                       reads nor updates the conversation history
+            
+        Returns:
+            PipelineResult with the response and execution details
+        """
+        start_time = time.perf_counter()
+        result = await self._aprocess(user_message, stateless)
+        result.latency_ms = (time.perf_counter() - start_time) * 1000
+        return result
+    
+    async def _aprocess(self, user_message: str, stateless: bool) -> PipelineResult:
+        """Run the pipeline stages for aprocess()."""
+        
+        # STEP 1: Input Guardrail
+        input_result = self.input_guardrail.check(user_message)
+        
+        if input_result.action == GuardrailAction.BLOCK:
+            return self._handle_blocked_input(input_result)
+        
+        if input_result.action == GuardrailAction.FLAG:
+            self._handle_flagged_input(input_result, user_message)
+        
+        cache_key = None
+        if input_result.action == GuardrailAction.ALLOW:
+            cache_key = self._response_cache_key(user_message, stateless)
+            cached = self._cached_result(cache_key, user_message, stateless)
+            if cached is not None:
+                return cached
+        
+        # STEP 2 + 3: Supervisor and Auditor
+        retries = 0
+        supervisor_response = None
+        auditor_response = None
+        
+        memory = ConversationMemory() if stateless else None
+        prescan = input_result.metadata.get("prescan")
+        
+        async def _draft(speculative: bool = False):
+            # Speculative drafts work on a scratch copy of the memory, which
+            # replaces the real one if the draft is used
+            draft_memory = memory
+            if speculative:
+                draft_memory = copy.deepcopy(self.supervisor.memory if memory is None else memory)
+            response = await self.supervisor.aprocess(user_message, draft_memory, prescan)
+            return draft_memory, response
+        
+        # Race several drafts first; on failure fall through to retries
+        accepted = False
+        if self.parallel_drafts > 1:
+            supervisor_response, auditor_response, retries, accepted = await self._race_drafts(
+                user_message, memory, prescan
+            )
+        
+        next_draft: asyncio.Task | None = None
+        try:
+            while not accepted and retries <= self.max_retries:
+                if next_draft is not None:
+                    draft_memory, supervisor_response = await next_draft
+                    next_draft = None
+                    if memory is None:
+                        self.supervisor.memory = draft_memory
+                    else:
+                        memory = draft_memory
+                else:
+                    _, supervisor_response = await _draft()
+                
+                # Start the next attempt while the auditor reviews this one
+                if self.speculative_retries and retries < self.max_retries:
+                    next_draft = asyncio.create_task(_draft(speculative=True))
+                
+                # IMPORTANT: Auditor only sees the draft response, NOT the user message
+                auditor_response = await self.auditor.aaudit(supervisor_response.content)
+                
+                if auditor_response.is_valid:
+                    break
+                
+                if auditor_response.metadata.get("requires_retry"):
+                    retries += 1
+                    if retries <= self.max_retries:
+                        continue
+                else:
+                    break
+        finally:
+            # The audit passed (or failed for good), drop the unused draft
+            if next_draft is not None:
+                next_draft.cancel()
+        
+        result = self._finalize(
+            input_result, supervisor_response, auditor_response, retries
+        )
+        self._store_result(cache_key, result, stateless)
+        return result
+    
+    async def _race_drafts(
+        self,
+        user_message: str,
+        memory: ConversationMemory | None,
+        prescan,
+    ) -> tuple[AgentResponse, AgentResponse | None, int, bool]:
+        """Draft and audit several responses at once, keeping the first that passes.
+        
+        Each draft works on its own copy of the conversation memory and the
+        winner's copy becomes the supervisor's memory (unless a throwaway
+        memory was given). Drafts still running when one passes are cancelled.
+        
+        Returns:
+            Tuple of (supervisor response, auditor response, failed drafts,
+            whether a draft was accepted)
+        """
+        base = self.supervisor.memory if memory is None else memory
+        
+        async def _draft_and_audit(draft_memory: ConversationMemory):
+            supervisor_response = await self.supervisor.aprocess(
+                user_message, draft_memory, prescan
+            )
+            auditor_response = await self.auditor.aaudit(supervisor_response.content)
+            return draft_memory, supervisor_response, auditor_response
+        
+        count = min(self.parallel_drafts, self.max_retries + 1)
+        pending = {
+            asyncio.create_task(_draft_and_audit(copy.deepcopy(base)))
+            for _ in range(count)
+        }
+        
+        failures = 0
+        supervisor_response = None
+        auditor_response = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    draft_memory, supervisor_response, auditor_response = task.result()
+                    
+                    # Same rule as the retry loop: approved, or corrected
+                    # by the auditor without asking for a retry
+                    if (
+                        auditor_response.is_valid
+                        or not auditor_response.metadata.get("requires_retry")
+                    ):
+                        if memory is None:
+                            self.supervisor.memory = draft_memory
+                        return supervisor_response, auditor_response, failures, True
+                    
+                    failures += 1
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        return supervisor_response, auditor_response, failures, False
+    
+    async def aprocess_batch(self, user_messages: list[str]) -> list[PipelineResult]:
+        """Process independent messages concurrently.
+        
+        Each message is processed statelessly, so no conversation memory is
+        shared, while guardrails, auditor and the LLM client are shared and
+        audit requests reuse the same cached prompt prefix and audit cache.
+        
+        Args:
+            user_messages: Independent user messages, one per conversation
+            
+        Returns:
+            PipelineResults in the same order as the messages
+        """
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(self.aprocess(message, stateless=True))
+                for message in user_messages
+            ]
+        return [task.result() for task in tasks]
+    
+    def _response_cache_key(self, user_message: str, stateless: bool) -> tuple[str, str]:
+        """Build the response cache key from the message and conversation state."""
+        state = ""
+        if not stateless:
+            memory = self.supervisor.memory
+            state = hashlib.blake2b(
+                repr((memory.get_history(max_turns=2), sorted(memory.context.items()))).encode(),
+                digest_size=16,
+            ).hexdigest()
+        return " ".join(user_message.lower().split()), state
+    
+    def _cached_result(self, cache_key: tuple[str, str], user_message: str, stateless: bool) -> PipelineResult | None:
+        """Get a cached result, recording the turn in memory as if it ran.
+        
+        Besides the messages, the conversation context (remembered order
+        and product IDs, last topic) is set to what the cached turn left.
+        """
+        entry = self.response_cache.get(cache_key)
+        if entry is None:
+            return None
+        
+        cached, context = entry
+        if not stateless:
+            memory = self.supervisor.memory
+            memory.add_message("user", user_message)
+            memory.add_message("assistant", cached.response)
+            memory.context = dict(context)
+        
+        result = copy.copy(cached)
+        result.from_cache = True
+        return result
+    
+    def _store_result(self, cache_key: tuple[str, str] | None, result: PipelineResult, stateless: bool):
+        """Cache a copy of a result unless it is a fallback, had side effects
+        or reports live order data.
+        
+        Stateful results are stored with the conversation context the turn
+        left behind, for _cached_result() to restore.
+        """
+        if cache_key is None or result.retries_used > self.max_retries:
+            return
+        
+        tool_calls = result.supervisor_response.tool_calls if result.supervisor_response else []
+        if any(call.name in STATEFUL_TOOLS for call in tool_calls):
+            return
+        if any(agent.value in result.sub_agents_used for agent in LIVE_DATA_AGENTS):
+            return
+        
+        # The caller still updates the result it holds (e.g. latency_ms)
+        context = None if stateless else dict(self.supervisor.memory.context)
+        self.response_cache.put(cache_key, (copy.copy(result), context))
+    
+    def _finalize(
+        self,
+        input_result: GuardrailResult,
+        supervisor_response: AgentResponse,
+        auditor_response: AgentResponse,
+        retries: int,
+    ) -> PipelineResult:
+        """Apply the output guardrail and build the pipeline result."""
+        
         # If we exhausted retries, use fallback
         if retries > self.max_retries:
             final_content = self.auditor.create_fallback_response("Max retries exceeded")
@@ -218,7 +538,6 @@ class ReputationSafeAgentPipeline:
             was_blocked=False,
             retries_used=retries,
             sub_agents_used=supervisor_response.metadata.get("sub_agents_used", []) if supervisor_response else [],
-            latency_ms=(time.time() - start_time) * 1000,
         )
         
         return result
@@ -4,31 +4,77 @@ This module provides vector search capabilities for product knowledge
 and documentation using Qdrant Cloud as the vector database.
 """
 
+import functools
 import hashlib
+import threading
+import uuid
 from typing import Any
 
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
+    Datatype,
     Distance,
     VectorParams,
-    PointStruct,
     Filter,
     FieldCondition,
     MatchValue,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    QueryRequest,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
 )
 
+from src.cache import LFUCache
 from src.config import config
 
 
+# Query embeddings shared across RAG instances, keyed by
+# (embedding model name, normalized query)
+_embedding_cache = LFUCache(capacity=50_000)
+
+
+def _id_digest(data: bytes) -> bytes:
+    """128-bit digest used for point IDs.
+    
+    Point IDs must be the same in every process that writes to a
+    collection, so this is always stdlib blake2b, never an optional
+    faster hash that only some installs have.
+    """
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_filter(conditions: tuple[tuple[str, Any], ...]) -> Filter:
+    """Build a match-all Filter once per distinct set of conditions."""
+    return Filter(must=[
+        FieldCondition(key=k, match=MatchValue(value=v))
+        for k, v in conditions
+    ])
+
+
 class QdrantRAG:
     """RAG implementation using Qdrant Cloud for vector storage."""
     
+    # Payload fields used in filters, indexed so Qdrant can filter during
+    # the HNSW search instead of after it
+    PAYLOAD_INDEXES: list[tuple[str, PayloadSchemaType]] = [
+        ("category", PayloadSchemaType.KEYWORD),
+        ("type", PayloadSchemaType.KEYWORD),
+        ("product_id", PayloadSchemaType.KEYWORD),
+        ("in_stock", PayloadSchemaType.BOOL),
+    ]
+    
     def __init__(
         self,
         url: str = None,
         api_key: str = None,
         collection_name: str = None,
         embedding_model: str = "all-MiniLM-L6-v2",
+        embedding_backend: str = "onnx",
+        hnsw_ef: int = None,
     ):
         """Initialize Qdrant Cloud client.
         
@@ -37,6 +83,9 @@ class QdrantRAG:
             api_key: Qdrant Cloud API key
             collection_name: Name of the collection to use
             embedding_model: Sentence transformer model for embeddings
+            embedding_backend: "onnx" for the int8-quantized ONNX Runtime
+                               model, "torch" for the PyTorch model
+            hnsw_ef: Default HNSW search breadth (None uses the collection's)
         """
         self.url = url or config.qdrant_url
         self.api_key = api_key or config.qdrant_api_key
@@ -44,9 +93,11 @@ class QdrantRAG:
         
         # Initialize Qdrant client for cloud
         if self.url and self.api_key:
+            # gRPC sends vectors as packed floats instead of JSON numbers
             self.client = QdrantClient(
                 url=self.url,
                 api_key=self.api_key,
+                prefer_grpc=True,
             )
         else:
             # Fallback to in-memory for testing
@@ -54,21 +105,64 @@ class QdrantRAG:
         
         # Initialize embedding model
         self.embedding_model_name = embedding_model
+        self.embedding_backend = embedding_backend
+        self.hnsw_ef = hnsw_ef
         self._embedder = None
+        self._embedder_lock = threading.Lock()
         self.vector_size = 384  # Default for all-MiniLM-L6-v2
+        self.embedding_cache = _embedding_cache
     
     @property
     def embedder(self):
-        """Lazy load the embedding model."""
+        """Lazy load the embedding model (once, even from several threads)."""
         if self._embedder is None:
-            from sentence_transformers import SentenceTransformer
-            self._embedder = SentenceTransformer(self.embedding_model_name)
-            self.vector_size = self._embedder.get_sentence_embedding_dimension()
+            with self._embedder_lock:
+                if self._embedder is None:
+                    embedder = self._load_embedder()
+                    self.vector_size = embedder.get_sentence_embedding_dimension()
+                    self._embedder = embedder
         return self._embedder
     
+    def _load_embedder(self):
+        """Load the sentence transformer for the configured backend."""
+        from sentence_transformers import SentenceTransformer
+        if self.embedding_backend == "onnx":
+            try:
+                # Dynamic int8 export, runs on VNNI int8 GEMMs on x86
+                return SentenceTransformer(
+                    self.embedding_model_name,
+                    backend="onnx",
+                    model_kwargs={"file_name": "onnx/model_qint8_avx512_vnni.onnx"},
+                )
+            except Exception:
+                # Older sentence-transformers, no onnxruntime or no int8
+                # export for this model: use the PyTorch model
+                pass
+        return SentenceTransformer(self.embedding_model_name)
+    
+    def warm(self):
+        """Load the model and run one encode so the first query is fast."""
+        self.embedder.encode("", convert_to_numpy=True)
+    
+    def _embed_cached(self, query: str):
+        """Embed a query, reusing the vector for repeated queries."""
+        key = (self.embedding_model_name, query.strip().lower())
+        embedding = self.embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embedder.encode(query, convert_to_numpy=True)
+            self.embedding_cache.put(key, embedding)
+        return embedding
+    
     def _generate_id(self, text: str) -> str:
-        """Generate a deterministic ID from text."""
-        return hashlib.md5(text.encode()).hexdigest()
+        """Generate a deterministic UUID from text, the same in every process."""
+        return str(uuid.UUID(bytes=_id_digest(text.encode())))
+    
+    def _generate_ids(self, texts: list[str]) -> list[str]:
+        """Generate IDs for many texts, hashing in a single C-level map.
+        
+        Each ID equals _generate_id() of the same text.
+        """
+        return [str(uuid.UUID(bytes=digest)) for digest in map(_id_digest, map(str.encode, texts))]
     
     def ensure_collection(self):
         """Create collection if it doesn't exist."""
@@ -81,8 +175,23 @@ class QdrantRAG:
                 vectors_config=VectorParams(
                     size=self.vector_size,
                     distance=Distance.COSINE,
+                    datatype=Datatype.FLOAT16,
+                ),
+                # int8 copies of the vectors kept in RAM for fast scoring
+                quantization_config=ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(
+                        type=ScalarType.INT8,
+                        quantile=0.99,
+                        always_ram=True,
+                    ),
                 ),
             )
+            for field_name, field_schema in self.PAYLOAD_INDEXES:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema,
+                )
             return True
         return False
     
@@ -102,34 +211,28 @@ class QdrantRAG:
         """
         self.ensure_collection()
         
-        points = []
-        for doc in documents:
-            text = doc.get("text", "")
-            metadata = doc.get("metadata", {})
-            
-            # Generate embedding
-            embedding = self.embedder.encode(text).tolist()
-            
-            # Create point
-            point_id = self._generate_id(text)
-            points.append(PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload={
-                    "text": text,
-                    **metadata,
-                },
-            ))
+        texts = [doc.get("text", "") for doc in documents]
         
-        # Upsert in batches
-        for i in range(0, len(points), batch_size):
-            batch = points[i:i + batch_size]
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=batch,
-            )
+        # Generate all embeddings in batched forward passes
+        embeddings = self.embedder.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        
+        # Upload the numpy vectors directly, without per-float list conversion
+        self.client.upload_collection(
+            collection_name=self.collection_name,
+            vectors=embeddings,
+            payload=[{"text": text, **doc.get("metadata", {})} for text, doc in zip(texts, documents)],
+            ids=self._generate_ids(texts),
+            batch_size=batch_size,
+            wait=True,
+        )
         
-        return len(points)
+        return len(texts)
     
     def search(
         self,
@@ -137,6 +240,7 @@ class QdrantRAG:
         limit: int = 5,
         filter_conditions: dict[str, Any] = None,
         score_threshold: float = 0.5,
+        hnsw_ef: int = None,
     ) -> list[dict[str, Any]]:
         """Search for similar documents.
         
@@ -145,39 +249,110 @@ class QdrantRAG:
             limit: Maximum number of results
             filter_conditions: Optional filter conditions (field: value)
             score_threshold: Minimum similarity score
+            hnsw_ef: HNSW search breadth for this query, lower is faster
             
         Returns:
             List of matching documents with scores
         """
         # Generate query embedding
-        query_embedding = self.embedder.encode(query).tolist()
-        
-        # Build filter if provided
-        search_filter = None
-        if filter_conditions:
-            conditions = [
-                FieldCondition(key=k, match=MatchValue(value=v))
-                for k, v in filter_conditions.items()
-            ]
-            search_filter = Filter(must=conditions)
+        query_embedding = self._embed_cached(query)
         
         # Search
         results = self.client.search(
             collection_name=self.collection_name,
             query_vector=query_embedding,
             limit=limit,
-            query_filter=search_filter,
+            query_filter=self._build_filter(filter_conditions),
             score_threshold=score_threshold,
+            search_params=self._search_params(hnsw_ef),
+        )
+        
+        return self._format_hits(results)
+    
+    def search_batch(
+        self,
+        queries: list[str],
+        limit: int | list[int] = 5,
+        filter_conditions: list[dict[str, Any] | None] = None,
+        score_threshold: float = 0.5,
+        hnsw_ef: int | list[int] = None,
+    ) -> list[list[dict[str, Any]]]:
+        """Search for several queries in one round-trip to Qdrant.
+        
+        Args:
+            queries: Search query texts
+            limit: Maximum number of results, shared or one per query
+            filter_conditions: Optional filter conditions, one per query
+            score_threshold: Minimum similarity score
+            hnsw_ef: HNSW search breadth, shared or one per query
+            
+        Returns:
+            One list of matching documents per query, in query order
+        """
+        if not queries:
+            return []
+        
+        limits = limit if isinstance(limit, list) else [limit] * len(queries)
+        filters = filter_conditions or [None] * len(queries)
+        efs = hnsw_ef if isinstance(hnsw_ef, list) else [hnsw_ef] * len(queries)
+        
+        # Embed cache misses in one batched forward pass
+        keys = [(self.embedding_model_name, q.strip().lower()) for q in queries]
+        embeddings = [self.embedding_cache.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = self.embedder.encode(
+                [queries[i] for i in missing],
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+                self.embedding_cache.put(keys[i], embedding)
+        
+        responses = self.client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=[
+                QueryRequest(
+                    query=embedding.tolist(),
+                    limit=query_limit,
+                    filter=self._build_filter(conditions),
+                    params=self._search_params(query_ef),
+                    score_threshold=score_threshold,
+                    with_payload=True,
+                )
+                for embedding, query_limit, conditions, query_ef in zip(embeddings, limits, filters, efs)
+            ],
         )
         
-        # Format results
+        return [self._format_hits(response.points) for response in responses]
+    
+    def _build_filter(self, filter_conditions: dict[str, Any] | None) -> Filter | None:
+        """Build a Qdrant filter from field/value conditions."""
+        if not filter_conditions:
+            return None
+        return _cached_filter(tuple(sorted(filter_conditions.items())))
+    
+    def _search_params(self, hnsw_ef: int = None) -> SearchParams:
+        """Build search params: HNSW breadth, int8 oversampling and rescoring."""
+        return SearchParams(
+            hnsw_ef=hnsw_ef or self.hnsw_ef,
+            exact=False,
+            quantization=QuantizationSearchParams(
+                rescore=True,
+                oversampling=2.0,
+            ),
+        )
+    
+    def _format_hits(self, hits) -> list[dict[str, Any]]:
+        """Convert scored points into result dicts."""
         return [
             {
                 "text": hit.payload.get("text", ""),
                 "score": hit.score,
                 "metadata": {k: v for k, v in hit.payload.items() if k != "text"},
             }
-            for hit in results
+            for hit in hits
         ]
     
     def delete_collection(self):
@@ -200,8 +375,30 @@ class QdrantRAG:
 class ProductKnowledgeBase:
     """Knowledge base for product information using RAG."""
     
+    # HNSW search breadth: FAQ lookups want few results from a small set,
+    # filtered product search needs a wider beam to keep recall
+    FAQ_HNSW_EF = 32
+    PRODUCT_HNSW_EF = 128
+    
+    # Lines of a product's searchable text: (label, product key, value format)
+    PRODUCT_TEXT_FIELDS: tuple[tuple[str, str, str], ...] = (
+        ("Product", "name", "{}"),
+        ("Category", "category", "{}"),
+        ("Description", "description", "{}"),
+        ("Price", "price", "${}"),
+        ("Specifications", "specs", "{}"),
+    )
+    
     def __init__(self, qdrant_rag: QdrantRAG = None):
-        self.rag = qdrant_rag or QdrantRAG()
+        self.rag = qdrant_rag or get_rag()
+    
+    def _product_text(self, product: dict) -> str:
+        """Create searchable text from product info, skipping missing fields."""
+        return "\n".join(
+            f"{label}: {fmt.format(product[key])}"
+            for label, key, fmt in self.PRODUCT_TEXT_FIELDS
+            if product.get(key) not in (None, "", {})
+        )
     
     def index_products(self, products: list[dict]) -> int:
         """Index product information for retrieval.
@@ -214,16 +411,8 @@ class ProductKnowledgeBase:
         """
         documents = []
         for product in products:
-            # Create searchable text from product info
-            text = f"""
-Product: {product.get('name', '')}
-Category: {product.get('category', '')}
-Description: {product.get('description', '')}
-Price: ${product.get('price', 0)}
-Specifications: {product.get('specs', {})}
-"""
             documents.append({
-                "text": text.strip(),
+                "text": self._product_text(product),
                 "metadata": {
                     "product_id": product.get("product_id", ""),
                     "name": product.get("name", ""),
@@ -259,6 +448,7 @@ Specifications: {product.get('specs', {})}
             query=query,
             limit=limit,
             filter_conditions=filters if filters else None,
+            hnsw_ef=self.PRODUCT_HNSW_EF,
         )
     
     def index_faqs(self, faqs: list[dict]) -> int:
@@ -289,16 +479,49 @@ Specifications: {product.get('specs', {})}
             query=query,
             limit=limit,
             filter_conditions={"type": "faq"},
+            hnsw_ef=self.FAQ_HNSW_EF,
+        )
+    
+    def search_many(
+        self,
+        query: str,
+        category: str = None,
+        limit: int = 5,
+        faq_limit: int = 3,
+    ) -> tuple[list[dict], list[dict]]:
+        """Search products and FAQs for a query in a single Qdrant call.
+        
+        Args:
+            query: Search query
+            category: Optional category filter for products
+            limit: Maximum product results
+            faq_limit: Maximum FAQ results
+            
+        Returns:
+            Tuple of (matching products, matching FAQs)
+        """
+        products, faqs = self.rag.search_batch(
+            queries=[query, query],
+            limit=[limit, faq_limit],
+            hnsw_ef=[self.PRODUCT_HNSW_EF, self.FAQ_HNSW_EF],
+            filter_conditions=[
+                {"category": category} if category else None,
+                {"type": "faq"},
+            ],
         )
+        return products, faqs
 
 
-# Singleton instance
+# Singleton instance, shared by the warm-up thread and requests
 _rag_instance: QdrantRAG | None = None
+_rag_lock = threading.Lock()
 
 
 def get_rag() -> QdrantRAG:
     """Get or create the RAG instance."""
     global _rag_instance
     if _rag_instance is None:
-        _rag_instance = QdrantRAG()
+        with _rag_lock:
+            if _rag_instance is None:
+                _rag_instance = QdrantRAG()
     return _rag_instance
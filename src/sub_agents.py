@@ -5,13 +5,79 @@ access only to the tools it needs.
 """
 
 from abc import ABC, abstractmethod
-import json
+from dataclasses import dataclass, field
+import asyncio
+import re
 
 from src.models import AgentResponse, AgentType, ToolCall, ConversationMemory
-from src.tools import OrderTools, ProductTools, SupportTools
+from src.tools import get_order_tools, get_product_tools, get_support_tools
+from src import json_codec
 from src.llm_client import get_client
 
 
+# Order and product IDs, matched against the upper-cased query
+ORDER_ID_RE = re.compile(r'ORD-\d{3}')
+PRODUCT_ID_RE = re.compile(r'PROD-\d{3}')
+
+# Product categories recognised in search queries
+PRODUCT_CATEGORIES = ("electronics", "accessories")
+
+# FAQ topics, checked in order
+FAQ_TOPICS = ("return", "refund", "shipping", "delivery", "warranty", "payment")
+
+# Query keywords that ask for support contact details
+CONTACT_KEYWORDS = ("contact", "phone", "email", "call")
+
+# Query keywords that make the support agent open a ticket
+TICKET_KEYWORDS = ("ticket", "complaint", "escalate")
+
+# Every keyword vocabulary compiled into one zero-width alternation, so a
+# single scan reports each keyword occurrence; _KEYWORD_INDEX maps each
+# group index to its (vocabulary, rank in vocabulary, keyword)
+_KEYWORD_VOCABULARIES = {
+    "category": PRODUCT_CATEGORIES,
+    "faq_topic": FAQ_TOPICS,
+    "contact": CONTACT_KEYWORDS,
+    "ticket": TICKET_KEYWORDS,
+}
+_KEYWORD_INDEX = [
+    (vocabulary, rank, keyword)
+    for vocabulary, keywords in _KEYWORD_VOCABULARIES.items()
+    for rank, keyword in enumerate(keywords)
+]
+_KEYWORD_RE = re.compile(
+    "(?=(?:"
+    + "|".join(f"(?P<g{i}>{re.escape(kw)})" for i, (_, _, kw) in enumerate(_KEYWORD_INDEX))
+    + "))"
+)
+
+
+def _match_keywords(query_lower: str) -> dict[str, str]:
+    """Find each vocabulary's matching keyword in one pass over the query.
+    
+    When several keywords of a vocabulary occur, the one listed first in
+    the vocabulary wins, as with a check of each keyword in order.
+    
+    Returns:
+        Matched keyword by vocabulary name, for vocabularies with a match
+    """
+    best: dict[str, tuple[int, str]] = {}
+    for match in _KEYWORD_RE.finditer(query_lower):
+        vocabulary, rank, keyword = _KEYWORD_INDEX[int(match.lastgroup[1:])]
+        if vocabulary not in best or rank < best[vocabulary][0]:
+            best[vocabulary] = (rank, keyword)
+    return {vocabulary: keyword for vocabulary, (_, keyword) in best.items()}
+
+
+@dataclass(slots=True)
+class SubAgentRequest:
+    """Tool results and the LLM prompt prepared for a query."""
+    prompt: str
+    temperature: float
+    tool_calls: list[ToolCall] = field(default_factory=list)
+    metadata: dict = field(default_factory=dict)
+
+
 class BaseSubAgent(ABC):
     """Base class for all sub-agents."""
     
@@ -22,15 +88,65 @@ class BaseSubAgent(ABC):
         self.available_tools: list[str] = []
     
     @abstractmethod
+    def _prepare(self, query: str, context: dict) -> SubAgentRequest:
+        """Call the tools for a query and build the LLM prompt."""
+        pass
+    
     def process(self, query: str, context: dict = None) -> AgentResponse:
         """Process a query and return a response."""
-        pass
+        request = self._prepare(query, context or {})
+        response_text = self.client.generate(
+            prompt=request.prompt,
+            system_instruction=self.system_prompt,
+            temperature=request.temperature,
+        )
+        return self._build_response(response_text, request)
+    
+    async def aprocess(self, query: str, context: dict = None) -> AgentResponse:
+        """Async variant of process(); tools run in a worker thread."""
+        request = await asyncio.to_thread(self._prepare, query, context or {})
+        response_text = await self.client.agenerate(
+            prompt=request.prompt,
+            system_instruction=self.system_prompt,
+            temperature=request.temperature,
+        )
+        return self._build_response(response_text, request)
+    
+    def is_read_only(self, query: str) -> bool:
+        """Whether processing the query only calls tools without side effects."""
+        return True
+    
+    def _build_response(self, response_text: str, request: SubAgentRequest) -> AgentResponse:
+        """Wrap the generated text and tool calls in an AgentResponse."""
+        return AgentResponse(
+            content=response_text,
+            agent_type=self.agent_type,
+            tool_calls=request.tool_calls,
+            metadata=request.metadata,
+        )
+    
+    def _tool_prompt(self, query: str, context: dict, tool_results: str, instruction: str) -> str:
+        """Build the LLM prompt from the query, context and tool results.
+        
+        Context entries without a value (e.g. no order ID yet) are left
+        out; the context is only serialized if any entry remains.
+        """
+        known = {key: value for key, value in context.items() if value is not None}
+        context_text = json_codec.dumps(known) if known else "None"
+        return f"""User Query: {query}
+
+Context: {context_text}
+
+Tool Results:
+{tool_results}
+
+{instruction}"""
     
     def _format_tool_result(self, tool_name: str, result: any) -> str:
         """Format a tool result for inclusion in the prompt."""
         if result is None:
             return f"Tool '{tool_name}' returned no results."
-        return f"Tool '{tool_name}' returned:\n{json.dumps(result, indent=2)}"
+        return f"Tool '{tool_name}' returned:\n{json_codec.dumps(result)}"
 
 
 class OrderAgent(BaseSubAgent):
@@ -39,7 +155,7 @@ class OrderAgent(BaseSubAgent):
     def __init__(self):
         super().__init__()
         self.agent_type = AgentType.ORDER_AGENT
-        self.tools = OrderTools()
+        self.tools = get_order_tools()
         self.available_tools = ["get_order", "get_order_status", "get_tracking_info", "cancel_order"]
         
         self.system_prompt = """You are an Order Assistant for an e-commerce platform.
@@ -60,17 +176,19 @@ Guidelines:
 
 Respond in a helpful, professional tone."""
     
-    def process(self, query: str, context: dict = None) -> AgentResponse:
-        """Process an order-related query."""
-        context = context or {}
+    def is_read_only(self, query: str) -> bool:
+        """Whether processing the query only calls tools without side effects."""
+        return "cancel" not in query.lower()
+    
+    def _prepare(self, query: str, context: dict) -> SubAgentRequest:
+        """Call the order tools for a query and build the LLM prompt."""
         tool_calls = []
         
         # Extract order ID from query or context
         order_id = context.get("order_id")
         if not order_id:
             # Try to extract from query
-            import re
-            match = re.search(r'ORD-\d{3}', query.upper())
+            match = ORDER_ID_RE.search(query.upper())
             if match:
                 order_id = match.group()
         
@@ -97,27 +215,18 @@ Respond in a helpful, professional tone."""
                 tool_calls.append(ToolCall(name="get_order", arguments={"order_id": order_id}, result=result))
                 tool_results = self._format_tool_result("get_order", result)
         
-        # Generate response using LLM
-        prompt = f"""User Query: {query}
-
-Context: {json.dumps(context) if context else "None"}
-
-Tool Results:
-{tool_results if tool_results else "No tools were called."}
-
-Based on the above, provide a helpful response to the customer about their order."""
+        prompt = self._tool_prompt(
+            query,
+            context,
+            tool_results or "No tools were called.",
+            "Based on the above, provide a helpful response to the customer about their order.",
+        )
         
-        response_text = self.client.generate(
+        return SubAgentRequest(
             prompt=prompt,
-            system_instruction=self.system_prompt,
             temperature=0.5,
-        )
-        
-        return AgentResponse(
-            content=response_text,
-            agent_type=self.agent_type,
             tool_calls=tool_calls,
-            metadata={"order_id": order_id}
+            metadata={"order_id": order_id},
         )
 
 
@@ -127,7 +236,7 @@ class ProductAgent(BaseSubAgent):
     def __init__(self):
         super().__init__()
         self.agent_type = AgentType.PRODUCT_AGENT
-        self.tools = ProductTools()
+        self.tools = get_product_tools()
         self.available_tools = ["search_products", "get_product_details", "check_availability", "get_products_by_category"]
         
         self.system_prompt = """You are a Product Assistant for an e-commerce platform.
@@ -148,18 +257,18 @@ Guidelines:
 
 Respond in a helpful, informative tone."""
     
-    def process(self, query: str, context: dict = None) -> AgentResponse:
-        """Process a product-related query."""
-        context = context or {}
+    def _prepare(self, query: str, context: dict) -> SubAgentRequest:
+        """Call the product tools for a query and build the LLM prompt."""
         tool_calls = []
         tool_results = ""
         
         query_lower = query.lower()
         
         # Extract product ID if present
-        import re
-        product_id_match = re.search(r'PROD-\d{3}', query.upper())
-        product_id = product_id_match.group() if product_id_match else context.get("product_id")
+        product_id = context.get("product_id")
+        if not product_id:
+            product_id_match = PRODUCT_ID_RE.search(query.upper())
+            product_id = product_id_match.group() if product_id_match else None
         
         if product_id:
             # Specific product query
@@ -174,12 +283,9 @@ Respond in a helpful, informative tone."""
         else:
             # Search query
             # Check for category-specific request
-            categories = ["electronics", "accessories"]
-            category = None
-            for cat in categories:
-                if cat in query_lower:
-                    category = cat.capitalize()
-                    break
+            category = _match_keywords(query_lower).get("category")
+            if category:
+                category = category.capitalize()
             
             # Perform search
             search_terms = query_lower.replace("show me", "").replace("find", "").replace("search for", "").strip()
@@ -187,25 +293,16 @@ Respond in a helpful, informative tone."""
             tool_calls.append(ToolCall(name="search_products", arguments={"query": search_terms, "category": category}, result=result))
             tool_results = self._format_tool_result("search_products", result)
         
-        # Generate response using LLM
-        prompt = f"""User Query: {query}
-
-Context: {json.dumps(context) if context else "None"}
-
-Tool Results:
-{tool_results if tool_results else "No results found."}
-
-Based on the above, provide a helpful response about the products."""
+        prompt = self._tool_prompt(
+            query,
+            context,
+            tool_results or "No results found.",
+            "Based on the above, provide a helpful response about the products.",
+        )
         
-        response_text = self.client.generate(
+        return SubAgentRequest(
             prompt=prompt,
-            system_instruction=self.system_prompt,
             temperature=0.7,
-        )
-        
-        return AgentResponse(
-            content=response_text,
-            agent_type=self.agent_type,
             tool_calls=tool_calls,
         )
 
@@ -216,7 +313,7 @@ class SupportAgent(BaseSubAgent):
     def __init__(self):
         super().__init__()
         self.agent_type = AgentType.SUPPORT_AGENT
-        self.tools = SupportTools()
+        self.tools = get_support_tools()
         self.available_tools = ["get_faq", "create_support_ticket", "get_contact_info"]
         
         self.system_prompt = """You are a Customer Support Assistant for an e-commerce platform.
@@ -237,35 +334,33 @@ Guidelines:
 
 Respond in a warm, helpful, and professional tone."""
     
-    def process(self, query: str, context: dict = None) -> AgentResponse:
-        """Process a support-related query."""
-        context = context or {}
+    def is_read_only(self, query: str) -> bool:
+        """Whether processing the query only calls tools without side effects."""
+        return "ticket" not in _match_keywords(query.lower())
+    
+    def _prepare(self, query: str, context: dict) -> SubAgentRequest:
+        """Call the support tools for a query and build the LLM prompt."""
         tool_calls = []
         tool_results = ""
         
-        query_lower = query.lower()
+        # Match FAQ topics, contact and ticket keywords in one pass
+        keywords = _match_keywords(query.lower())
         
         # Check for FAQ topics
-        faq_topics = ["return", "refund", "shipping", "delivery", "warranty", "payment"]
-        matched_topic = None
-        for topic in faq_topics:
-            if topic in query_lower:
-                matched_topic = topic
-                break
-        
+        matched_topic = keywords.get("faq_topic")
         if matched_topic:
             result = self.tools.get_faq(matched_topic)
             tool_calls.append(ToolCall(name="get_faq", arguments={"topic": matched_topic}, result=result))
             tool_results = self._format_tool_result("get_faq", result)
         
         # Check if they want contact info
-        if "contact" in query_lower or "phone" in query_lower or "email" in query_lower or "call" in query_lower:
+        if "contact" in keywords:
             result = self.tools.get_contact_info()
             tool_calls.append(ToolCall(name="get_contact_info", arguments={}, result=result))
             tool_results += "\n\n" + self._format_tool_result("get_contact_info", result)
         
         # Check if they want to create a ticket
-        if "ticket" in query_lower or "complaint" in query_lower or "escalate" in query_lower:
+        if "ticket" in keywords:
             # In a real system, we'd gather more info first
             result = self.tools.create_support_ticket(
                 subject="Customer Inquiry",
@@ -274,25 +369,16 @@ Respond in a warm, helpful, and professional tone."""
             tool_calls.append(ToolCall(name="create_support_ticket", arguments={"subject": "Customer Inquiry", "description": query}, result=result))
             tool_results += "\n\n" + self._format_tool_result("create_support_ticket", result)
         
-        # Generate response using LLM
-        prompt = f"""User Query: {query}
-
-Context: {json.dumps(context) if context else "None"}
-
-Tool Results:
-{tool_results if tool_results else "No specific FAQ matched."}
-
-Based on the above, provide a helpful response to the customer's support inquiry."""
+        prompt = self._tool_prompt(
+            query,
+            context,
+            tool_results or "No specific FAQ matched.",
+            "Based on the above, provide a helpful response to the customer's support inquiry.",
+        )
         
-        response_text = self.client.generate(
+        return SubAgentRequest(
             prompt=prompt,
-            system_instruction=self.system_prompt,
             temperature=0.6,
-        )
-        
-        return AgentResponse(
-            content=response_text,
-            agent_type=self.agent_type,
             tool_calls=tool_calls,
         )
 
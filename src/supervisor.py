@@ -7,27 +7,194 @@ The supervisor is responsible for:
 4. Composing final responses from sub-agent outputs
 """
 
+import asyncio
+import functools
+import hashlib
 import json
-from typing import Any
+import string
+from collections import Counter
+from typing import Any, Callable, Iterator
 
-from src.models import AgentResponse, AgentType, ConversationMemory
-from src.sub_agents import get_sub_agent, BaseSubAgent
+from src import json_codec
+from src.cache import LFUCache
+from src.guardrails import InputGuardrail, StreamChecker
+from src.models import AgentResponse, AgentType, ConversationMemory, ScanResult
+from src.sub_agents import ORDER_ID_RE, PRODUCT_ID_RE, get_sub_agent, BaseSubAgent
 from src.llm_client import get_client
 
 
+# Routing-keyword-only scanner for messages that come without an input
+# guardrail prescan; its patterns are compiled once here
+_ROUTE_SCANNER = InputGuardrail(blocked_patterns=[], abuse_patterns=[], high_risk_intents=[])
+
+# Keyword hits a route needs (with no other route hit) for fast routing
+FAST_ROUTE_MIN_HITS = 2
+
+# Routing decision schema enforced by the model (mirrors the JSON described
+# in the routing prompt), and a cap on its output since a decision is short
+ROUTING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string"},
+        "route_to": {
+            "type": "string",
+            "enum": ["ORDER_AGENT", "PRODUCT_AGENT", "SUPPORT_AGENT", "NONE"],
+        },
+        "requires_multiple": {"type": "boolean"},
+        "additional_routes": {
+            "type": "array",
+            "items": {
+                "type": "string",
+                "enum": ["ORDER_AGENT", "PRODUCT_AGENT", "SUPPORT_AGENT"],
+            },
+        },
+        "extracted_entities": {
+            "type": "object",
+            "properties": {
+                "order_id": {"type": "string", "nullable": True},
+                "product_id": {"type": "string", "nullable": True},
+                "topic": {"type": "string", "nullable": True},
+            },
+        },
+        "is_greeting_or_smalltalk": {"type": "boolean"},
+    },
+    "required": ["intent", "route_to", "requires_multiple", "is_greeting_or_smalltalk"],
+    "property_ordering": [
+        "intent",
+        "route_to",
+        "requires_multiple",
+        "additional_routes",
+        "extracted_entities",
+        "is_greeting_or_smalltalk",
+    ],
+}
+ROUTING_MAX_TOKENS = 256
+
+# Fixed replies for greetings and thanks, by normalized message; these
+# skip routing and composition
+CANNED_REPLIES = {
+    **dict.fromkeys(
+        ["hi", "hello", "hey", "hi there", "hello there", "good morning", "good afternoon", "good evening"],
+        "Hello and welcome to TechStore! I can help you with:\n\n"
+        "- **Orders**: tracking, status and cancellations\n"
+        "- **Products**: search, details and availability\n"
+        "- **Support**: returns, shipping, warranty and payments\n\n"
+        "What can I do for you today?",
+    ),
+    **dict.fromkeys(
+        ["thanks", "thank you", "thanks a lot", "thank you very much", "thx", "ty"],
+        "You're welcome! Is there anything else I can help you with?",
+    ),
+    **dict.fromkeys(
+        ["bye", "goodbye", "see you"],
+        "Thanks for visiting TechStore. Have a great day!",
+    ),
+}
+
+# Topics outside the store's scope; when the router sends such a message to
+# no specialist it gets OUT_OF_SCOPE_REPLY instead of an LLM response
+OUT_OF_SCOPE_KEYWORDS = ("weather", "joke", "poem", "recipe", "horoscope", "lottery")
+OUT_OF_SCOPE_REPLY = (
+    "I'm sorry, that's outside what I can help with here. I can assist with "
+    "your orders, our products, and support topics like returns, shipping, "
+    "warranty and payments. What would you like to know?"
+)
+
+# Intent reported for keyword-based routing decisions
+_KEYWORD_INTENTS = {
+    "ORDER_AGENT": "order inquiry",
+    "PRODUCT_AGENT": "product inquiry",
+    "SUPPORT_AGENT": "support inquiry",
+}
+
+
+@functools.lru_cache(maxsize=16)
+def _template_parts(template: str) -> tuple[tuple[str, str | None], ...]:
+    """Split a ``str.format`` template into (literal, field name) pairs.
+    
+    Parsed once per template, so filling it is a plain join. Format specs
+    and conversions are not supported.
+    """
+    return tuple(
+        (literal, field_name)
+        for literal, field_name, _, _ in string.Formatter().parse(template)
+    )
+
+
+def _normalize_smalltalk(message: str) -> str:
+    """Normalize a message for lookup in CANNED_REPLIES."""
+    return " ".join(message.lower().split()).strip("!.?, ")
+
+
+@functools.lru_cache(maxsize=1024)
+def _extract_ids(message: str) -> tuple[str | None, str | None]:
+    """Find the order and product IDs mentioned in a message.
+    
+    Returns:
+        Tuple of (order ID, product ID), None where not mentioned
+    """
+    message_upper = message.upper()
+    order_match = ORDER_ID_RE.search(message_upper)
+    product_match = PRODUCT_ID_RE.search(message_upper)
+    return (
+        order_match.group() if order_match else None,
+        product_match.group() if product_match else None,
+    )
+
+
+def _fill_template(template: str, **values: str) -> str:
+    """Fill a template's named fields using its cached parts."""
+    return "".join(
+        literal if field_name is None else literal + values[field_name]
+        for literal, field_name in _template_parts(template)
+    )
+
+
+# Sub-agents whose answers reflect live data and are never cached
+LIVE_DATA_AGENTS = {AgentType.ORDER_AGENT}
+
+
 class SupervisorAgent:
     """Orchestrates sub-agents and manages the conversation."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        stream_checker_factory: Callable[[], StreamChecker] = None,
+        cache_capacity: int = 10_000,
+        fast_routing: bool = False,
+        cache_ttl: float = 300.0,
+    ):
+        """Initialize the supervisor.
+        
+        Args:
+            stream_checker_factory: Optional factory for a blocked-term checker.
+                                    When set, the composed response is streamed
+                                    and generation stops at the first blocked term;
+                                    the text up to there is kept as the (truncated)
+                                    draft, for the output guardrail to redact.
+                                    Without it the full response is generated.
+            cache_capacity: Maximum number of cached routing decisions and
+                            sub-agent responses each (0 disables caching)
+            fast_routing: Route messages whose keywords clearly point to a
+                          single specialist without calling the LLM router
+            cache_ttl: Seconds a cached routing decision or sub-agent
+                       response is reused before it is fetched again
+        """
         self.client = get_client()
         self.memory = ConversationMemory()
+        self.stream_checker_factory = stream_checker_factory
+        self.fast_routing = fast_routing
         
-        # Available sub-agents
-        self.sub_agents: dict[AgentType, BaseSubAgent] = {
-            AgentType.ORDER_AGENT: get_sub_agent(AgentType.ORDER_AGENT),
-            AgentType.PRODUCT_AGENT: get_sub_agent(AgentType.PRODUCT_AGENT),
-            AgentType.SUPPORT_AGENT: get_sub_agent(AgentType.SUPPORT_AGENT),
-        }
+        # Routing decisions keyed by (normalized message, remembered entities)
+        # and read-only sub-agent responses keyed by
+        # (agent type, normalized query, context digest); both are shared
+        # across conversations, so entries expire after cache_ttl
+        self.routing_cache = LFUCache(capacity=cache_capacity, ttl=cache_ttl)
+        self.sub_agent_cache = LFUCache(capacity=cache_capacity, ttl=cache_ttl)
+        
+        # Sub-agents created so far; each is built on first use by
+        # _get_agent, so a conversation only pays for the ones it routes to
+        self.sub_agents: dict[AgentType, BaseSubAgent] = {}
         
         self.system_prompt = """You are a Customer Service Supervisor for TechStore, an e-commerce platform.
 Your role is to:
@@ -75,51 +242,158 @@ Respond with a JSON object:
 
 Only respond with the JSON object, no additional text."""
     
-    def _route_query(self, user_message: str) -> dict:
-        """Determine which sub-agent(s) should handle the query."""
+    def _routing_request(self, user_message: str, memory: ConversationMemory) -> dict:
+        """Build the routing classifier call for a message."""
         context_summary = {
-            "recent_messages": len(self.memory.messages),
-            "last_topic": self.memory.get_context("last_topic"),
-            "last_order_id": self.memory.get_context("order_id"),
-            "last_product_id": self.memory.get_context("product_id"),
+            "recent_messages": len(memory.messages),
+            "last_topic": memory.get_context("last_topic"),
+            "last_order_id": memory.get_context("order_id"),
+            "last_product_id": memory.get_context("product_id"),
         }
         
-        prompt = self.routing_prompt.format(
+        prompt = _fill_template(
+            self.routing_prompt,
             message=user_message,
-            context=json.dumps(context_summary)
+            context=json_codec.dumps(context_summary),
         )
         
-        response = self.client.generate(
-            prompt=prompt,
-            system_instruction="You are a routing classifier. Output only valid JSON.",
-            temperature=0.1,
-            response_format="json"
+        return {
+            "prompt": prompt,
+            "system_instruction": "You are a routing classifier. Output only valid JSON.",
+            "temperature": 0.1,
+            "max_tokens": ROUTING_MAX_TOKENS,
+            "response_format": "json",
+            "response_schema": ROUTING_SCHEMA,
+        }
+    
+    def _routing_cache_key(self, user_message: str, memory: ConversationMemory) -> tuple:
+        """Build the routing cache key from the message and remembered entities."""
+        return (
+            " ".join(user_message.lower().split()),
+            memory.get_context("last_topic"),
+            memory.get_context("order_id"),
+            memory.get_context("product_id"),
         )
+    
+    def _parse_routing(
+        self,
+        response: str,
+        user_message: str,
+        prescan: ScanResult = None,
+        cache_key: tuple = None,
+    ) -> dict:
+        """Parse the routing classifier output, falling back to keywords.
         
+        Only decisions parsed from the classifier output are cached.
+        """
         try:
-            return json.loads(response)
+            routing_result = json_codec.loads(response)
         except json.JSONDecodeError:
             # Fallback routing
-            return self._fallback_routing(user_message)
+            return self._fallback_routing(user_message, prescan)
+        
+        if cache_key is not None:
+            self.routing_cache.put(cache_key, routing_result)
+        return routing_result
+    
+    def _route_query(
+        self,
+        user_message: str,
+        memory: ConversationMemory = None,
+        prescan: ScanResult = None,
+    ) -> dict:
+        """Determine which sub-agent(s) should handle the query."""
+        memory = self.memory if memory is None else memory
+        
+        if _normalize_smalltalk(user_message) in CANNED_REPLIES:
+            return self._smalltalk_routing()
+        
+        if self.fast_routing:
+            routing_result = self._fast_route(user_message, prescan)
+            if routing_result is not None:
+                return routing_result
+        
+        cache_key = self._routing_cache_key(user_message, memory)
+        cached = self.routing_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        response = self.client.generate(**self._routing_request(user_message, memory))
+        return self._parse_routing(response, user_message, prescan, cache_key)
+    
+    async def _aroute_query(
+        self,
+        user_message: str,
+        memory: ConversationMemory,
+        prescan: ScanResult = None,
+    ) -> dict:
+        """Async variant of _route_query()."""
+        if _normalize_smalltalk(user_message) in CANNED_REPLIES:
+            return self._smalltalk_routing()
+        
+        if self.fast_routing:
+            routing_result = self._fast_route(user_message, prescan)
+            if routing_result is not None:
+                return routing_result
+        
+        cache_key = self._routing_cache_key(user_message, memory)
+        cached = self.routing_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        response = await self.client.agenerate(**self._routing_request(user_message, memory))
+        return self._parse_routing(response, user_message, prescan, cache_key)
+    
+    def _smalltalk_routing(self) -> dict:
+        """Routing decision for messages with a canned reply."""
+        return {
+            "route_to": "NONE",
+            "intent": "greeting or smalltalk",
+            "is_greeting_or_smalltalk": True,
+        }
     
-    def _fallback_routing(self, message: str) -> dict:
-        """Simple keyword-based fallback routing."""
-        message_lower = message.lower()
+    def _fast_route(self, message: str, prescan: ScanResult = None) -> dict | None:
+        """Route by keywords alone when they clearly point to one specialist.
         
-        # Order keywords
-        order_keywords = ["order", "tracking", "shipped", "delivery", "cancel", "status", "ord-"]
-        if any(kw in message_lower for kw in order_keywords):
-            return {"route_to": "ORDER_AGENT", "intent": "order inquiry"}
+        Applies when a single route has at least FAST_ROUTE_MIN_HITS keyword
+        hits and no other route has any; order and product IDs are
+        extracted with the sub-agents' ID patterns.
         
-        # Product keywords
-        product_keywords = ["product", "price", "stock", "available", "buy", "search", "find", "show me", "prod-"]
-        if any(kw in message_lower for kw in product_keywords):
-            return {"route_to": "PRODUCT_AGENT", "intent": "product inquiry"}
+        Returns:
+            The routing decision, or None if the LLM router is needed
+        """
+        if prescan is None:
+            prescan = _ROUTE_SCANNER.scan(message)
+        hits = Counter(m.payload for m in prescan.of("route"))
+        if len(hits) != 1:
+            return None
         
-        # Support/FAQ keywords
-        support_keywords = ["return", "refund", "warranty", "shipping", "payment", "help", "support", "contact"]
-        if any(kw in message_lower for kw in support_keywords):
-            return {"route_to": "SUPPORT_AGENT", "intent": "support inquiry"}
+        (route, count), = hits.items()
+        if count < FAST_ROUTE_MIN_HITS:
+            return None
+        
+        order_id, product_id = _extract_ids(message)
+        return {
+            "route_to": route,
+            "intent": _KEYWORD_INTENTS[route],
+            "extracted_entities": {"order_id": order_id, "product_id": product_id},
+            "fast_path": True,
+        }
+    
+    def _fallback_routing(self, message: str, prescan: ScanResult = None) -> dict:
+        """Simple keyword-based fallback routing.
+        
+        Reuses the input guardrail's scan when given instead of scanning
+        the message again; otherwise the message is scanned for routing
+        keywords only.
+        """
+        if prescan is None:
+            prescan = _ROUTE_SCANNER.scan(message)
+        hit_routes = {m.payload for m in prescan.of("route")}
+        
+        for route in ("ORDER_AGENT", "PRODUCT_AGENT", "SUPPORT_AGENT"):
+            if route in hit_routes:
+                return {"route_to": route, "intent": _KEYWORD_INTENTS[route]}
         
         # Default to support for general queries
         return {"route_to": "SUPPORT_AGENT", "intent": "general inquiry", "is_greeting_or_smalltalk": True}
@@ -133,21 +407,35 @@ Only respond with the JSON object, no additional text."""
         }
         return mapping.get(route_str)
     
-    def _compose_response(
+    def _get_agent(self, agent_type: AgentType | None) -> BaseSubAgent | None:
+        """Get the sub-agent for a type, creating it on first use."""
+        if agent_type is None:
+            return None
+        agent = self.sub_agents.get(agent_type)
+        if agent is None:
+            agent = self.sub_agents.setdefault(agent_type, get_sub_agent(agent_type))
+        return agent
+    
+    def _compose_request(
         self,
         user_message: str,
         routing_result: dict,
-        sub_agent_responses: list[AgentResponse]
-    ) -> str:
-        """Compose the final response from sub-agent outputs."""
+        sub_agent_responses: list[AgentResponse],
+    ) -> tuple[str, float, bool]:
+        """Build the prompt for the final response.
+        
+        Returns:
+            Tuple of (prompt, temperature, whether the output is streamed
+            through the blocked-term checker)
+        """
         
         # Handle greetings/smalltalk directly
         if routing_result.get("is_greeting_or_smalltalk") and not sub_agent_responses:
-            return self._handle_greeting(user_message)
+            return self._greeting_prompt(user_message), 0.7, False
         
         # If no sub-agent responses, handle directly
         if not sub_agent_responses:
-            return self._handle_direct(user_message)
+            return self._direct_prompt(user_message), 0.7, False
         
         # Compose from sub-agent responses
         sub_agent_content = "\n\n".join([
@@ -172,17 +460,123 @@ Instructions:
 
 Compose the final response to send to the customer:"""
         
-        response = self.client.generate(
-            prompt=composition_prompt,
+        return composition_prompt, 0.6, self.stream_checker_factory is not None
+    
+    def _canned_reply(
+        self,
+        user_message: str,
+        routing_result: dict,
+        sub_agent_responses: list[AgentResponse],
+    ) -> str | None:
+        """Get a fixed reply for greetings and obvious out-of-scope requests.
+        
+        Returns:
+            The reply, or None if the response needs the LLM
+        """
+        if sub_agent_responses:
+            return None
+        
+        reply = CANNED_REPLIES.get(_normalize_smalltalk(user_message))
+        if reply is not None:
+            return reply
+        
+        if not routing_result.get("is_greeting_or_smalltalk"):
+            message_lower = user_message.lower()
+            if any(kw in message_lower for kw in OUT_OF_SCOPE_KEYWORDS):
+                return OUT_OF_SCOPE_REPLY
+        
+        return None
+    
+    def _compose_response(
+        self,
+        user_message: str,
+        routing_result: dict,
+        sub_agent_responses: list[AgentResponse],
+        stream_hits: list[str] = None,
+    ) -> str:
+        """Compose the final response from sub-agent outputs.
+        
+        Blocked terms detected while streaming are appended to stream_hits.
+        """
+        canned = self._canned_reply(user_message, routing_result, sub_agent_responses)
+        if canned is not None:
+            return canned
+        
+        prompt, temperature, stream_output = self._compose_request(
+            user_message, routing_result, sub_agent_responses
+        )
+        
+        if not stream_output:
+            return self.client.generate(
+                prompt=prompt,
+                system_instruction=self.system_prompt,
+                temperature=temperature,
+            )
+        
+        # Check the response while it streams and stop generating at the
+        # first blocked term instead of paying for the rest of the output
+        checker = self.stream_checker_factory()
+        chunks = []
+        stream = self.client.generate_stream(
+            prompt=prompt,
             system_instruction=self.system_prompt,
-            temperature=0.6,
+            temperature=temperature,
         )
+        for chunk in stream:
+            chunks.append(chunk)
+            hits = checker.feed(chunk)
+            if hits:
+                if stream_hits is not None:
+                    stream_hits.extend(hits)
+                stream.close()
+                break
         
-        return response
+        return "".join(chunks)
     
-    def _handle_greeting(self, message: str) -> str:
-        """Handle greetings and smalltalk."""
-        prompt = f"""The customer said: "{message}"
+    async def _acompose_response(
+        self,
+        user_message: str,
+        routing_result: dict,
+        sub_agent_responses: list[AgentResponse],
+        stream_hits: list[str] = None,
+    ) -> str:
+        """Async variant of _compose_response()."""
+        canned = self._canned_reply(user_message, routing_result, sub_agent_responses)
+        if canned is not None:
+            return canned
+        
+        prompt, temperature, stream_output = self._compose_request(
+            user_message, routing_result, sub_agent_responses
+        )
+        
+        if not stream_output:
+            return await self.client.agenerate(
+                prompt=prompt,
+                system_instruction=self.system_prompt,
+                temperature=temperature,
+            )
+        
+        checker = self.stream_checker_factory()
+        chunks = []
+        stream = self.client.agenerate_stream(
+            prompt=prompt,
+            system_instruction=self.system_prompt,
+            temperature=temperature,
+        )
+        async for chunk in stream:
+            chunks.append(chunk)
+            hits = checker.feed(chunk)
+            if hits:
+                if stream_hits is not None:
+                    stream_hits.extend(hits)
+                await stream.aclose()
+                break
+        
+        return "".join(chunks)
+    
+    def _greeting_prompt(self, message: str) -> str:
+        """Build the prompt for greetings and smalltalk."""
+        return f"""The customer said: "{message}"
 
 Respond with a warm, brief greeting. Offer to help with:
 - Order inquiries (tracking, status, cancellations)
@@ -190,80 +584,339 @@ Respond with a warm, brief greeting. Offer to help with:
 - General support (returns, shipping, warranty, payments)
 
 Keep it short and welcoming."""
-        
-        return self.client.generate(
-            prompt=prompt,
-            system_instruction=self.system_prompt,
-            temperature=0.7,
-        )
     
-    def _handle_direct(self, message: str) -> str:
-        """Handle queries that don't need sub-agents."""
-        prompt = f"""Customer message: "{message}"
+    def _direct_prompt(self, message: str) -> str:
+        """Build the prompt for queries that don't need sub-agents."""
+        return f"""Customer message: "{message}"
 
 Provide a helpful response. If you can't help with their specific request,
 kindly explain what you can help with (orders, products, support)."""
-        
-        return self.client.generate(
-            prompt=prompt,
-            system_instruction=self.system_prompt,
-            temperature=0.7,
-        )
     
-    def process(self, user_message: str) -> AgentResponse:
-        """Process a user message through the supervisor pipeline."""
+    def process(
+        self,
+        user_message: str,
+        memory: ConversationMemory = None,
+        prescan: ScanResult = None,
+    ) -> AgentResponse:
+        """Process a user message through the supervisor pipeline.
+        
+        Args:
+            user_message: The user's message
+            memory: Memory to use for this turn instead of the supervisor's
+                    own conversation memory (e.g. a throwaway one for
+                    stateless requests)
+            prescan: The input guardrail's scan of the message, reused for
+                     keyword routing
+        """
+        memory = self.memory if memory is None else memory
         
         # Add message to memory
-        self.memory.add_message("user", user_message)
+        memory.add_message("user", user_message)
         
         # Step 1: Route the query
-        routing_result = self._route_query(user_message)
+        self._remember_ids(user_message, memory)
+        routing_result = self._route_query(user_message, memory, prescan)
+        self._remember_entities(routing_result, memory)
+        
+        # Step 2: Call sub-agent(s)
+        sub_agent_responses = [
+            self._call_sub_agent(agent, user_message, context)
+            for agent, context in self._sub_agent_calls(routing_result, memory)
+        ]
+        
+        # Step 3: Compose final response
+        stream_hits: list[str] = []
+        final_content = self._compose_response(
+            user_message,
+            routing_result,
+            sub_agent_responses,
+            stream_hits,
+        )
+        
+        return self._finish_turn(final_content, routing_result, sub_agent_responses, stream_hits, memory)
+    
+    def _stream_process(
+        self,
+        user_message: str,
+        memory: ConversationMemory = None,
+        prescan: ScanResult = None,
+    ) -> Iterator[str]:
+        """Process a user message, yielding the final response as it is generated.
+        
+        UNSAFE for customer-facing output: the chunks go straight to the
+        caller without the auditor's review or the output guardrail's PII
+        redaction, disclaimers and length limit. Only the stream checker
+        (when a factory is set) applies, ending the stream before the
+        first chunk containing a blocked term. Replies shown to customers
+        must go through the pipeline's process() or aprocess() instead.
+        
+        Routing and sub-agents run as in process(); only the final
+        composition is streamed.
+        
+        The streamed text is added to memory once the stream ends, also
+        when the caller stops reading early.
+        
+        Args:
+            user_message: The user's message
+            memory: Memory to use for this turn instead of the supervisor's
+                    own conversation memory
+            prescan: The input guardrail's scan of the message
+        """
+        memory = self.memory if memory is None else memory
+        
+        memory.add_message("user", user_message)
+        
+        self._remember_ids(user_message, memory)
+        routing_result = self._route_query(user_message, memory, prescan)
+        self._remember_entities(routing_result, memory)
+        
+        sub_agent_responses = [
+            self._call_sub_agent(agent, user_message, context)
+            for agent, context in self._sub_agent_calls(routing_result, memory)
+        ]
+        
+        checker = self.stream_checker_factory() if self.stream_checker_factory else None
+        
+        canned = self._canned_reply(user_message, routing_result, sub_agent_responses)
+        if canned is not None:
+            stream = (chunk for chunk in (canned,))
+        else:
+            prompt, temperature, _ = self._compose_request(
+                user_message, routing_result, sub_agent_responses
+            )
+            stream = self.client.generate_stream(
+                prompt=prompt,
+                system_instruction=self.system_prompt,
+                temperature=temperature,
+            )
+        
+        chunks = []
+        try:
+            for chunk in stream:
+                if checker is not None and checker.feed(chunk):
+                    break
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            stream.close()
+            if chunks:
+                memory.add_message("assistant", "".join(chunks))
+    
+    async def aprocess(
+        self,
+        user_message: str,
+        memory: ConversationMemory = None,
+        prescan: ScanResult = None,
+    ) -> AgentResponse:
+        """Async variant of process().
+        
+        The primary and any additional sub-agents run concurrently, so a
+        multi-route turn takes as long as its slowest sub-agent. The
+        keyword-routed sub-agent is started speculatively alongside the
+        router. In-flight LLM calls are capped by the client's per-loop
+        semaphore.
+        
+        Args:
+            user_message: The user's message
+            memory: Memory to use for this turn instead of the supervisor's
+                    own conversation memory
+            prescan: The input guardrail's scan of the message
+        """
+        memory = self.memory if memory is None else memory
         
-        # Extract entities for context
+        memory.add_message("user", user_message)
+        
+        # Start the keyword-routed sub-agent while the router runs; its
+        # response is only used if the router picks the same agent with
+        # the same context
+        self._remember_ids(user_message, memory)
+        speculative = self._speculate(user_message, memory, prescan)
+        try:
+            routing_result = await self._aroute_query(user_message, memory, prescan)
+            self._remember_entities(routing_result, memory)
+            
+            calls = []
+            for agent, context in self._sub_agent_calls(routing_result, memory):
+                if speculative and speculative[:2] == (agent, context):
+                    calls.append(speculative[2])
+                    speculative = None
+                else:
+                    calls.append(self._acall_sub_agent(agent, user_message, context))
+            
+            # The router disagreed, stop the speculative call right away
+            if speculative:
+                speculative[2].cancel()
+                speculative = None
+            
+            sub_agent_responses = list(await asyncio.gather(*calls))
+        finally:
+            if speculative:
+                speculative[2].cancel()
+        
+        stream_hits: list[str] = []
+        final_content = await self._acompose_response(
+            user_message,
+            routing_result,
+            sub_agent_responses,
+            stream_hits,
+        )
+        
+        return self._finish_turn(final_content, routing_result, sub_agent_responses, stream_hits, memory)
+    
+    async def aprocess_batch(self, user_messages: list[str]) -> list[AgentResponse]:
+        """Process independent messages concurrently, e.g. for offline evaluation.
+        
+        Each message gets its own empty memory, so neither the messages nor
+        the supervisor's conversation affect each other. Routing decisions
+        and sub-agent responses are still shared through the caches, and
+        in-flight LLM calls are capped by the client's semaphore.
+        
+        Args:
+            user_messages: Independent user messages
+            
+        Returns:
+            AgentResponses in the same order as the messages
+        """
+        return list(await asyncio.gather(*[
+            self.aprocess(message, ConversationMemory())
+            for message in user_messages
+        ]))
+    
+    def _remember_ids(self, user_message: str, memory: ConversationMemory):
+        """Store the order and product IDs mentioned in the message.
+        
+        The message is scanned once per turn; entities extracted by the
+        router are stored afterwards and take precedence.
+        """
+        order_id, product_id = _extract_ids(user_message)
+        if order_id:
+            memory.set_context("order_id", order_id)
+        if product_id:
+            memory.set_context("product_id", product_id)
+    
+    def _remember_entities(self, routing_result: dict, memory: ConversationMemory):
+        """Store the entities extracted by the router in the memory context."""
         entities = routing_result.get("extracted_entities", {})
         if entities.get("order_id"):
-            self.memory.set_context("order_id", entities["order_id"])
+            memory.set_context("order_id", entities["order_id"])
         if entities.get("product_id"):
-            self.memory.set_context("product_id", entities["product_id"])
+            memory.set_context("product_id", entities["product_id"])
         if entities.get("topic"):
-            self.memory.set_context("last_topic", entities["topic"])
+            memory.set_context("last_topic", entities["topic"])
+    
+    def _speculate(
+        self,
+        user_message: str,
+        memory: ConversationMemory,
+        prescan: ScanResult = None,
+    ) -> tuple[BaseSubAgent, dict, asyncio.Task] | None:
+        """Start the keyword-routed primary sub-agent ahead of the router.
         
-        # Step 2: Call sub-agent(s)
-        sub_agent_responses: list[AgentResponse] = []
+        Nothing is started for messages without a routing keyword or when
+        the sub-agent would call a tool with side effects.
+        
+        Returns:
+            Tuple of (sub-agent, context, running task), or None
+        """
+        prior = self._fallback_routing(user_message, prescan)
+        if prior.get("is_greeting_or_smalltalk"):
+            return None
+        
+        agent = self._get_agent(self._get_agent_type(prior["route_to"]))
+        if agent is None or not agent.is_read_only(user_message):
+            return None
+        
+        context = self._primary_context(memory)
+        return agent, context, asyncio.create_task(
+            self._acall_sub_agent(agent, user_message, context)
+        )
+    
+    def _sub_agent_cache_key(self, agent: BaseSubAgent, query: str, context: dict) -> tuple | None:
+        """Build the sub-agent cache key, or None if the response must not be cached.
+        
+        Queries with side effects are never cached, nor are the order
+        agent's answers, which report live order status and tracking.
+        """
+        if agent.agent_type in LIVE_DATA_AGENTS or not agent.is_read_only(query):
+            return None
+        context_digest = hashlib.blake2b(
+            json_codec.dumps(context).encode(), digest_size=16
+        ).hexdigest()
+        return agent.agent_type.value, " ".join(query.lower().split()), context_digest
+    
+    def _call_sub_agent(self, agent: BaseSubAgent, query: str, context: dict) -> AgentResponse:
+        """Call a sub-agent, reusing a cached response for read-only queries."""
+        cache_key = self._sub_agent_cache_key(agent, query, context)
+        if cache_key is not None:
+            cached = self.sub_agent_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        response = agent.process(query, context)
+        if cache_key is not None:
+            self.sub_agent_cache.put(cache_key, response)
+        return response
+    
+    async def _acall_sub_agent(self, agent: BaseSubAgent, query: str, context: dict) -> AgentResponse:
+        """Async variant of _call_sub_agent()."""
+        cache_key = self._sub_agent_cache_key(agent, query, context)
+        if cache_key is not None:
+            cached = self.sub_agent_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        response = await agent.aprocess(query, context)
+        if cache_key is not None:
+            self.sub_agent_cache.put(cache_key, response)
+        return response
+    
+    def _primary_context(self, memory: ConversationMemory) -> dict:
+        """Build the context passed to the primary sub-agent."""
+        return {
+            "order_id": memory.get_context("order_id"),
+            "product_id": memory.get_context("product_id"),
+            "history": memory.get_history(max_turns=3),
+        }
+    
+    def _sub_agent_calls(
+        self,
+        routing_result: dict,
+        memory: ConversationMemory,
+    ) -> list[tuple[BaseSubAgent, dict]]:
+        """List the sub-agents to call for a routing decision, with their context."""
+        calls = []
         
         primary_route = routing_result.get("route_to")
         if primary_route and primary_route != "NONE":
-            agent_type = self._get_agent_type(primary_route)
-            if agent_type and agent_type in self.sub_agents:
-                context = {
-                    "order_id": self.memory.get_context("order_id"),
-                    "product_id": self.memory.get_context("product_id"),
-                    "history": self.memory.get_history(max_turns=3),
-                }
-                response = self.sub_agents[agent_type].process(user_message, context)
-                sub_agent_responses.append(response)
+            agent = self._get_agent(self._get_agent_type(primary_route))
+            if agent is not None:
+                calls.append((agent, self._primary_context(memory)))
         
         # Handle multiple routes if needed
         if routing_result.get("requires_multiple"):
             for route in routing_result.get("additional_routes", []):
-                agent_type = self._get_agent_type(route)
-                if agent_type and agent_type in self.sub_agents:
+                agent = self._get_agent(self._get_agent_type(route))
+                if agent is not None:
                     context = {
-                        "order_id": self.memory.get_context("order_id"),
-                        "product_id": self.memory.get_context("product_id"),
+                        "order_id": memory.get_context("order_id"),
+                        "product_id": memory.get_context("product_id"),
                     }
-                    response = self.sub_agents[agent_type].process(user_message, context)
-                    sub_agent_responses.append(response)
+                    calls.append((agent, context))
         
-        # Step 3: Compose final response
-        final_content = self._compose_response(
-            user_message,
-            routing_result,
-            sub_agent_responses
-        )
+        return calls
+    
+    def _finish_turn(
+        self,
+        final_content: str,
+        routing_result: dict,
+        sub_agent_responses: list[AgentResponse],
+        stream_hits: list[str],
+        memory: ConversationMemory,
+    ) -> AgentResponse:
+        """Record the reply in memory and build the supervisor response."""
         
         # Add response to memory
-        self.memory.add_message("assistant", final_content)
+        memory.add_message("assistant", final_content)
         
         # Collect all tool calls
         all_tool_calls = []
@@ -277,6 +930,7 @@ kindly explain what you can help with (orders, products, support)."""
             metadata={
                 "routing": routing_result,
                 "sub_agents_used": [r.agent_type.value for r in sub_agent_responses],
+                "stream_blocked_terms": stream_hits,
             }
         )
     
@@ -1,10 +1,19 @@
 """Mock tools for the sub-agents."""
 
-from src.models import Order, Product
+import copy
+import functools
+import itertools
+import random
+import re
+from types import MappingProxyType
+from typing import Mapping
 
+from src.models import SEARCH_TEXT_SEPARATOR, Order, Product
 
-# Mock database
-MOCK_ORDERS: dict[str, Order] = {
+
+# Mock database, read-only: the search indexes and tool results below
+# are derived from it once at import
+MOCK_ORDERS: Mapping[str, Order] = MappingProxyType({
     "ORD-001": Order(
         order_id="ORD-001",
         status="shipped",
@@ -32,9 +41,9 @@ MOCK_ORDERS: dict[str, Order] = {
         shipping_address="789 Pine Rd, Izmir, TR",
         tracking_number="TRK987654321"
     ),
-}
+})
 
-MOCK_PRODUCTS: dict[str, Product] = {
+MOCK_PRODUCTS: Mapping[str, Product] = MappingProxyType({
     "PROD-001": Product(
         product_id="PROD-001",
         name="Wireless Headphones Pro",
@@ -71,34 +80,205 @@ MOCK_PRODUCTS: dict[str, Product] = {
         in_stock=True,
         specs={"switch_type": "Cherry MX Red", "layout": "Full-size", "connectivity": "USB/Wireless"}
     ),
+})
+
+# FAQ entries by topic keyword and support contact details; tools return
+# copies, so a caller changing a result never affects later lookups
+MOCK_FAQS: dict[str, dict] = {
+    "return": {
+        "topic": "Returns & Refunds",
+        "content": "You can return most items within 30 days of delivery for a full refund. "
+                  "Items must be unused and in original packaging."
+    },
+    "shipping": {
+        "topic": "Shipping Information",
+        "content": "We offer standard shipping (5-7 business days) and express shipping (2-3 business days). "
+                  "Free shipping on orders over 200 TL."
+    },
+    "warranty": {
+        "topic": "Warranty Information",
+        "content": "Most electronics come with a 2-year manufacturer warranty. "
+                  "Accessories have a 1-year warranty."
+    },
+    "payment": {
+        "topic": "Payment Methods",
+        "content": "We accept credit cards (Visa, Mastercard), debit cards, and bank transfers. "
+                  "Installment options available for orders over 500 TL."
+    }
+}
+
+# Zero-width alternation over the FAQ keywords (reporting overlapping
+# occurrences too) and each keyword's position in MOCK_FAQS
+_FAQ_KEYWORD_RE = re.compile("(?=(" + "|".join(map(re.escape, MOCK_FAQS)) + "))")
+_FAQ_KEYWORD_RANK = {key: rank for rank, key in enumerate(MOCK_FAQS)}
+
+CONTACT_INFO: dict[str, str] = {
+    "phone": "+90 212 555 0123",
+    "email": "support@techstore.com",
+    "hours": "Monday-Friday 9:00-18:00, Saturday 10:00-14:00",
+    "live_chat": "Available on website during business hours"
+}
+
+# cancel_order() results by order status (None: no such order) for the
+# orders that cannot be cancelled; returned as copies like MOCK_FAQS
+CANCEL_REFUSALS: dict[str | None, dict] = {
+    None: {"success": False, "message": "Order not found"},
+    "delivered": {"success": False, "message": "Cannot cancel delivered orders"},
+    "shipped": {"success": False, "message": "Order already shipped. Please initiate a return instead."},
+}
+
+# Ticket numbers count up from a random start; next() on itertools.count is
+# atomic under the GIL, so concurrent agents never draw the same number
+_ticket_numbers = itertools.count(random.randint(10000, 99999))
+
+
+
+def _trigrams(text: str) -> set[str]:
+    """All 3-character substrings of a string."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _build_product_indexes() -> tuple[dict[str, list[str]], dict[str, list[str]]]:
+    """Index MOCK_PRODUCTS for search.
+    
+    Returns:
+        Tuple of (product IDs by trigram of the lower-cased search text,
+        product IDs by lower-cased category), each list in MOCK_PRODUCTS
+        order
+    """
+    by_trigram: dict[str, list[str]] = {}
+    by_category: dict[str, list[str]] = {}
+    for product_id, product in MOCK_PRODUCTS.items():
+        for gram in _trigrams(product._search_text):
+            by_trigram.setdefault(gram, []).append(product_id)
+        by_category.setdefault(product._category_lower, []).append(product_id)
+    return by_trigram, by_category
+
+
+# Search indexes over MOCK_PRODUCTS, built once at import
+_PRODUCTS_BY_TRIGRAM, _PRODUCTS_BY_CATEGORY = _build_product_indexes()
+
+
+# Tool results for each mock order and product, built once at import;
+# tools return copies (deep ones where items/specs nest), so a caller
+# changing a result never affects later lookups
+_ORDER_DETAILS: dict[str, dict] = {
+    order.order_id: {
+        "order_id": order.order_id,
+        "status": order.status,
+        "items": order.items,
+        "total": order.total,
+        "shipping_address": order.shipping_address,
+        "tracking_number": order.tracking_number
+    }
+    for order in MOCK_ORDERS.values()
 }
 
+_PRODUCT_DETAILS: dict[str, dict] = {
+    product.product_id: {
+        "product_id": product.product_id,
+        "name": product.name,
+        "price": product.price,
+        "description": product.description,
+        "category": product.category,
+        "in_stock": product.in_stock,
+        "specs": product.specs
+    }
+    for product in MOCK_PRODUCTS.values()
+}
+
+_PRODUCT_AVAILABILITY: dict[str, dict] = {
+    product.product_id: {
+        "product_id": product.product_id,
+        "name": product.name,
+        "in_stock": product.in_stock,
+        "message": "Available" if product.in_stock else "Currently out of stock"
+    }
+    for product in MOCK_PRODUCTS.values()
+}
+
+
+def _search_candidates(query_lower: str) -> list[Product]:
+    """Products that may contain the query in their name or description.
+    
+    A string containing the query contains all of the query's trigrams,
+    so only products listed under every one of them can match; queries
+    shorter than a trigram match against every product. Queries holding
+    the search text separator can match no single field, so no product.
+    """
+    if SEARCH_TEXT_SEPARATOR in query_lower:
+        return []
+    if len(query_lower) < 3:
+        return list(MOCK_PRODUCTS.values())
+    
+    candidates = None
+    for gram in _trigrams(query_lower):
+        posting = _PRODUCTS_BY_TRIGRAM.get(gram)
+        if posting is None:
+            return []
+        candidates = set(posting) if candidates is None else candidates.intersection(posting)
+        if not candidates:
+            return []
+    
+    return [product for product_id, product in MOCK_PRODUCTS.items() if product_id in candidates]
+
+
+def _find_order(order_id: str) -> Order | None:
+    """Look up a mock order by ID, case-insensitively.
+    
+    IDs usually arrive upper-cased already (they are extracted from the
+    upper-cased query), so the exact key is tried before upper-casing.
+    """
+    order = MOCK_ORDERS.get(order_id)
+    if order is None:
+        order = MOCK_ORDERS.get(order_id.upper())
+    return order
+
+
+def _find_product(product_id: str) -> Product | None:
+    """Look up a mock product by ID, case-insensitively."""
+    product = MOCK_PRODUCTS.get(product_id)
+    if product is None:
+        product = MOCK_PRODUCTS.get(product_id.upper())
+    return product
+
+
+@functools.cache
+def _knowledge_base():
+    """The shared product knowledge base, or None if RAG is unavailable."""
+    try:
+        from src.rag import ProductKnowledgeBase
+        return ProductKnowledgeBase()
+    except Exception:
+        return None
+
+
+@functools.cache
+def _web_search_tool():
+    """The shared web search tool, or None if it cannot be created."""
+    try:
+        from src.web_search import WebSearchTool
+        return WebSearchTool()
+    except Exception:
+        return None
+
 
 class OrderTools:
     """Tools for order-related operations."""
     
     @staticmethod
     def get_order(order_id: str) -> dict | None:
-        order = MOCK_ORDERS.get(order_id.upper())
-        if order:
-            return {
-                "order_id": order.order_id,
-                "status": order.status,
-                "items": order.items,
-                "total": order.total,
-                "shipping_address": order.shipping_address,
-                "tracking_number": order.tracking_number
-            }
-        return None
+        order = _find_order(order_id)
+        return copy.deepcopy(_ORDER_DETAILS[order.order_id]) if order else None
     
     @staticmethod
     def get_order_status(order_id: str) -> str | None:
-        order = MOCK_ORDERS.get(order_id.upper())
+        order = _find_order(order_id)
         return order.status if order else None
     
     @staticmethod
     def get_tracking_info(order_id: str) -> dict | None:
-        order = MOCK_ORDERS.get(order_id.upper())
+        order = _find_order(order_id)
         if order and order.tracking_number:
             return {
                 "tracking_number": order.tracking_number,
@@ -110,61 +290,40 @@ class OrderTools:
     
     @staticmethod
     def cancel_order(order_id: str) -> dict:
-        order = MOCK_ORDERS.get(order_id.upper())
+        order = _find_order(order_id)
         if not order:
-            return {"success": False, "message": "Order not found"}
-        if order.status == "delivered":
-            return {"success": False, "message": "Cannot cancel delivered orders"}
-        if order.status == "shipped":
-            return {"success": False, "message": "Order already shipped. Please initiate a return instead."}
+            return dict(CANCEL_REFUSALS[None])
+        refusal = CANCEL_REFUSALS.get(order.status)
+        if refusal is not None:
+            return dict(refusal)
         return {"success": True, "message": f"Order {order_id} has been cancelled"}
 
 
 class ProductTools:
     """Tools for product-related operations."""
     
-    def __init__(self):
-        self._rag = None
-        self._web_search = None
-    
-    @property
-    def rag(self):
-        if self._rag is None:
-            try:
-                from src.rag import ProductKnowledgeBase
-                self._rag = ProductKnowledgeBase()
-            except Exception:
-                pass
-        return self._rag
-    
-    @property
-    def web_search(self):
-        if self._web_search is None:
-            try:
-                from src.web_search import WebSearchTool
-                self._web_search = WebSearchTool()
-            except Exception:
-                pass
-        return self._web_search
-    
     def search_products(self, query: str, category: str = None) -> list[dict]:
         results = []
         query_lower = query.lower()
+        category_lower = category.lower() if category is not None else None
         
-        for product in MOCK_PRODUCTS.values():
-            if query_lower in product.name.lower() or query_lower in product.description.lower():
-                if category is None or product.category.lower() == category.lower():
-                    results.append({
-                        "product_id": product.product_id,
-                        "name": product.name,
-                        "price": product.price,
-                        "in_stock": product.in_stock,
-                        "category": product.category
-                    })
+        for product in _search_candidates(query_lower):
+            # The category compare is cheaper than the substring scan
+            if category_lower is not None and product._category_lower != category_lower:
+                continue
+            if query_lower in product._search_text:
+                results.append({
+                    "product_id": product.product_id,
+                    "name": product.name,
+                    "price": product.price,
+                    "in_stock": product.in_stock,
+                    "category": product.category
+                })
         
-        if self.rag and not results:
+        knowledge_base = _knowledge_base()
+        if knowledge_base and not results:
             try:
-                rag_results = self.rag.search_products(query, category, limit=5)
+                rag_results = knowledge_base.search_products(query, category, limit=5)
                 for r in rag_results:
                     if r.get("metadata"):
                         results.append({
@@ -181,97 +340,55 @@ class ProductTools:
         return results
     
     def get_product_details(self, product_id: str) -> dict | None:
-        product = MOCK_PRODUCTS.get(product_id.upper())
-        if product:
-            return {
-                "product_id": product.product_id,
-                "name": product.name,
-                "price": product.price,
-                "description": product.description,
-                "category": product.category,
-                "in_stock": product.in_stock,
-                "specs": product.specs
-            }
-        return None
+        product = _find_product(product_id)
+        return copy.deepcopy(_PRODUCT_DETAILS[product.product_id]) if product else None
     
     def check_availability(self, product_id: str) -> dict | None:
-        product = MOCK_PRODUCTS.get(product_id.upper())
-        if product:
-            return {
-                "product_id": product.product_id,
-                "name": product.name,
-                "in_stock": product.in_stock,
-                "message": "Available" if product.in_stock else "Currently out of stock"
-            }
-        return None
+        product = _find_product(product_id)
+        return dict(_PRODUCT_AVAILABILITY[product.product_id]) if product else None
     
     def get_products_by_category(self, category: str) -> list[dict]:
         results = []
-        for product in MOCK_PRODUCTS.values():
-            if product.category.lower() == category.lower():
-                results.append({
-                    "product_id": product.product_id,
-                    "name": product.name,
-                    "price": product.price,
-                    "in_stock": product.in_stock
-                })
+        for product_id in _PRODUCTS_BY_CATEGORY.get(category.lower(), []):
+            product = MOCK_PRODUCTS[product_id]
+            results.append({
+                "product_id": product.product_id,
+                "name": product.name,
+                "price": product.price,
+                "in_stock": product.in_stock
+            })
         return results
     
     def search_web_for_product(self, product_name: str) -> dict | None:
-        if self.web_search and self.web_search.tavily.is_available():
-            return self.web_search.search_product_info(product_name)
+        web_search = _web_search_tool()
+        if web_search and web_search.tavily.is_available():
+            return web_search.search_product_info(product_name)
         return None
 
 
 class SupportTools:
     """Tools for customer support operations."""
     
-    def __init__(self):
-        self._web_search = None
-    
-    @property
-    def web_search(self):
-        if self._web_search is None:
-            try:
-                from src.web_search import WebSearchTool
-                self._web_search = WebSearchTool()
-            except Exception:
-                pass
-        return self._web_search
-    
     @staticmethod
     def get_faq(topic: str) -> dict | None:
-        faqs = {
-            "return": {
-                "topic": "Returns & Refunds",
-                "content": "You can return most items within 30 days of delivery for a full refund. "
-                          "Items must be unused and in original packaging."
-            },
-            "shipping": {
-                "topic": "Shipping Information",
-                "content": "We offer standard shipping (5-7 business days) and express shipping (2-3 business days). "
-                          "Free shipping on orders over 200 TL."
-            },
-            "warranty": {
-                "topic": "Warranty Information",
-                "content": "Most electronics come with a 2-year manufacturer warranty. "
-                          "Accessories have a 1-year warranty."
-            },
-            "payment": {
-                "topic": "Payment Methods",
-                "content": "We accept credit cards (Visa, Mastercard), debit cards, and bank transfers. "
-                          "Installment options available for orders over 500 TL."
-            }
-        }
-        for key, faq in faqs.items():
-            if key in topic.lower():
-                return faq
-        return None
+        topic_lower = topic.lower()
+        
+        # The support agent passes the matched keyword itself, so an exact
+        # key is one dict probe; free-form topics fall back to a substring scan
+        faq = MOCK_FAQS.get(topic_lower)
+        if faq is not None:
+            return dict(faq)
+        
+        # One scan finds every keyword occurrence; the keyword listed first
+        # in MOCK_FAQS wins, as with a check of each keyword in order
+        found = _FAQ_KEYWORD_RE.findall(topic_lower)
+        if not found:
+            return None
+        return dict(MOCK_FAQS[min(found, key=_FAQ_KEYWORD_RANK.__getitem__)])
     
     @staticmethod
     def create_support_ticket(subject: str, description: str) -> dict:
-        import random
-        ticket_id = f"TKT-{random.randint(10000, 99999)}"
+        ticket_id = f"TKT-{next(_ticket_numbers)}"
         return {
             "ticket_id": ticket_id,
             "subject": subject,
@@ -281,14 +398,29 @@ class SupportTools:
     
     @staticmethod
     def get_contact_info() -> dict:
-        return {
-            "phone": "+90 212 555 0123",
-            "email": "support@techstore.com",
-            "hours": "Monday-Friday 9:00-18:00, Saturday 10:00-14:00",
-            "live_chat": "Available on website during business hours"
-        }
+        return dict(CONTACT_INFO)
     
     def search_web_for_help(self, topic: str) -> dict | None:
-        if self.web_search and self.web_search.tavily.is_available():
-            return self.web_search.search_support_info(topic)
+        web_search = _web_search_tool()
+        if web_search and web_search.tavily.is_available():
+            return web_search.search_support_info(topic)
         return None
+
+
+# The tool classes hold no state, so every agent shares one instance of each
+@functools.cache
+def get_order_tools() -> OrderTools:
+    """Get the shared order tools instance."""
+    return OrderTools()
+
+
+@functools.cache
+def get_product_tools() -> ProductTools:
+    """Get the shared product tools instance."""
+    return ProductTools()
+
+
+@functools.cache
+def get_support_tools() -> SupportTools:
+    """Get the shared support tools instance."""
+    return SupportTools()
@@ -4,15 +4,47 @@ Tavily provides fast, accurate web search optimized for LLM applications.
 This module integrates Tavily for real-time information retrieval.
 """
 
+import asyncio
+import time
 from dataclasses import dataclass
-from typing import Any
-
-from tavily import TavilyClient
+from typing import Any, Iterator
 
+from src.cache import LFUCache
 from src.config import config
 
 
-@dataclass
+# Successful search results by search arguments, as (monotonic expiry
+# time, result); web results go stale, so entries expire after the TTL
+SEARCH_CACHE_TTL = 300.0
+_search_cache = LFUCache(capacity=1_000)
+
+
+# search() keyword arguments by search_for_context() context type
+CONTEXT_SETTINGS: dict[str, dict[str, Any]] = {
+    "product": {
+        "search_depth": "advanced",
+        "max_results": 5,
+        "include_answer": True,
+    },
+    "support": {
+        "search_depth": "basic",
+        "max_results": 3,
+        "include_answer": True,
+    },
+    "news": {
+        "search_depth": "basic",
+        "max_results": 5,
+        "include_answer": False,
+    },
+    "general": {
+        "search_depth": "basic",
+        "max_results": 5,
+        "include_answer": True,
+    },
+}
+
+
+@dataclass(slots=True)
 class SearchResult:
     """A single search result from Tavily."""
     title: str
@@ -22,9 +54,91 @@ class SearchResult:
     raw_content: str | None = None
 
 
+def _not_configured() -> dict[str, Any]:
+    """Search result returned when no Tavily API key is set."""
+    return {
+        "error": "Tavily API key not configured",
+        "answer": None,
+        "results": [],
+    }
+
+
+def _search_error(error: Exception) -> dict[str, Any]:
+    """Search result returned when a Tavily request fails."""
+    return {
+        "error": str(error),
+        "answer": None,
+        "results": [],
+    }
+
+
+def _parse_response(query: str, response: dict) -> dict[str, Any]:
+    """Convert a raw Tavily response into a search result."""
+    results = [
+        SearchResult(
+            title=r.get("title", ""),
+            url=r.get("url", ""),
+            content=r.get("content", ""),
+            score=r.get("score", 0.0),
+            raw_content=r.get("raw_content"),
+        )
+        for r in response.get("results", ())
+    ]
+    
+    return {
+        "answer": response.get("answer"),
+        "results": results,
+        "query": query,
+        "response_time": response.get("response_time", 0),
+    }
+
+
+def _search_cache_key(query: str, **kwargs) -> tuple:
+    """Cache key for a search: the query and every search argument."""
+    return (query, *(
+        tuple(value) if isinstance(value, list) else value
+        for value in kwargs.values()
+    ))
+
+
+def _cached_search(key: tuple) -> dict[str, Any] | None:
+    """Get an unexpired cached search result, or None."""
+    entry = _search_cache.get(key)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    
+    # Copy the result list so callers cannot change the cached entry
+    result = entry[1]
+    return {**result, "results": list(result["results"])}
+
+
+def _cache_search(key: tuple, result: dict[str, Any]) -> dict[str, Any]:
+    """Cache a successful search result for SEARCH_CACHE_TTL seconds.
+    
+    Returns:
+        A copy of the result for the caller
+    """
+    _search_cache.put(key, (time.monotonic() + SEARCH_CACHE_TTL, result))
+    return {**result, "results": list(result["results"])}
+
+
+def _quick_search_lines(result: dict[str, Any]) -> Iterator[str]:
+    """Yield the lines of a quick_search() summary, one result per item."""
+    # Include answer if available
+    if result.get("answer"):
+        yield f"Summary: {result['answer']}\n"
+    
+    # Include results
+    yield "Sources:"
+    for i, r in enumerate(result.get("results", []), 1):
+        yield f"{i}. {r.title}\n   {r.content[:200]}...\n   URL: {r.url}\n"
+
+
 class TavilySearch:
     """Web search using Tavily API."""
     
+    __slots__ = ("api_key", "client", "aclient")
+    
     def __init__(self, api_key: str = None):
         """Initialize Tavily client.
         
@@ -34,9 +148,13 @@ class TavilySearch:
         self.api_key = api_key or config.tavily_api_key
         
         if self.api_key:
+            # Imported here so deployments without a Tavily key never load the SDK
+            from tavily import AsyncTavilyClient, TavilyClient
             self.client = TavilyClient(api_key=self.api_key)
+            self.aclient = AsyncTavilyClient(api_key=self.api_key)
         else:
             self.client = None
+            self.aclient = None
     
     def is_available(self) -> bool:
         """Check if Tavily is configured and available."""
@@ -67,47 +185,62 @@ class TavilySearch:
             Dictionary with 'answer', 'results', and metadata
         """
         if not self.client:
-            return {
-                "error": "Tavily API key not configured",
-                "answer": None,
-                "results": [],
-            }
+            return _not_configured()
+        
+        kwargs = {
+            "search_depth": search_depth,
+            "max_results": max_results,
+            "include_answer": include_answer,
+            "include_raw_content": include_raw_content,
+            "include_domains": include_domains,
+            "exclude_domains": exclude_domains,
+        }
+        
+        # Repeated searches within the TTL skip the HTTPS round trip
+        key = _search_cache_key(query, **kwargs)
+        cached = _cached_search(key)
+        if cached is not None:
+            return cached
         
         try:
-            response = self.client.search(
-                query=query,
-                search_depth=search_depth,
-                max_results=max_results,
-                include_answer=include_answer,
-                include_raw_content=include_raw_content,
-                include_domains=include_domains,
-                exclude_domains=exclude_domains,
-            )
-            
-            # Parse results
-            results = []
-            for r in response.get("results", []):
-                results.append(SearchResult(
-                    title=r.get("title", ""),
-                    url=r.get("url", ""),
-                    content=r.get("content", ""),
-                    score=r.get("score", 0.0),
-                    raw_content=r.get("raw_content"),
-                ))
-            
-            return {
-                "answer": response.get("answer"),
-                "results": results,
-                "query": query,
-                "response_time": response.get("response_time", 0),
-            }
-            
+            response = self.client.search(query=query, **kwargs)
+            return _cache_search(key, _parse_response(query, response))
+        except Exception as e:
+            return _search_error(e)
+    
+    async def asearch(
+        self,
+        query: str,
+        search_depth: str = "basic",
+        max_results: int = 5,
+        include_answer: bool = True,
+        include_raw_content: bool = False,
+        include_domains: list[str] = None,
+        exclude_domains: list[str] = None,
+    ) -> dict[str, Any]:
+        """Async variant of search(), for running several searches concurrently."""
+        if not self.aclient:
+            return _not_configured()
+        
+        kwargs = {
+            "search_depth": search_depth,
+            "max_results": max_results,
+            "include_answer": include_answer,
+            "include_raw_content": include_raw_content,
+            "include_domains": include_domains,
+            "exclude_domains": exclude_domains,
+        }
+        
+        key = _search_cache_key(query, **kwargs)
+        cached = _cached_search(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            response = await self.aclient.search(query=query, **kwargs)
+            return _cache_search(key, _parse_response(query, response))
         except Exception as e:
-            return {
-                "error": str(e),
-                "answer": None,
-                "results": [],
-            }
+            return _search_error(e)
     
     def quick_search(self, query: str, max_results: int = 3) -> str:
         """Perform a quick search and return formatted results.
@@ -129,20 +262,7 @@ class TavilySearch:
         if result.get("error"):
             return f"Search error: {result['error']}"
         
-        output = []
-        
-        # Include answer if available
-        if result.get("answer"):
-            output.append(f"Summary: {result['answer']}\n")
-        
-        # Include results
-        output.append("Sources:")
-        for i, r in enumerate(result.get("results", []), 1):
-            output.append(f"{i}. {r.title}")
-            output.append(f"   {r.content[:200]}...")
-            output.append(f"   URL: {r.url}\n")
-        
-        return "\n".join(output)
+        return "\n".join(_quick_search_lines(result))
     
     def search_for_context(
         self,
@@ -162,35 +282,49 @@ class TavilySearch:
         Returns:
             Search results optimized for context
         """
-        settings = {
-            "product": {
-                "search_depth": "advanced",
-                "max_results": 5,
-                "include_answer": True,
-            },
-            "support": {
-                "search_depth": "basic",
-                "max_results": 3,
-                "include_answer": True,
-            },
-            "news": {
-                "search_depth": "basic",
-                "max_results": 5,
-                "include_answer": False,
-            },
-            "general": {
-                "search_depth": "basic",
-                "max_results": 5,
-                "include_answer": True,
-            },
-        }
-        
-        ctx_settings = settings.get(context_type, settings["general"])
+        ctx_settings = CONTEXT_SETTINGS.get(context_type, CONTEXT_SETTINGS["general"])
         return self.search(query=query, **ctx_settings)
+    
+    async def asearch_for_context(
+        self,
+        query: str,
+        context_type: str = "general",
+    ) -> dict[str, Any]:
+        """Async variant of search_for_context()."""
+        ctx_settings = CONTEXT_SETTINGS.get(context_type, CONTEXT_SETTINGS["general"])
+        return await self.asearch(query=query, **ctx_settings)
+
+
+def _summarize(query: str, result: dict[str, Any], content_chars: int = None) -> dict:
+    """Condense a search result into the tool output format.
+    
+    Args:
+        query: The query that was searched
+        result: Result from TavilySearch
+        content_chars: Characters of content to keep per source, or None
+            to list sources by title and URL only
+    """
+    if content_chars is None:
+        sources = [{"title": r.title, "url": r.url} for r in result.get("results", [])]
+    else:
+        sources = [
+            {"title": r.title, "url": r.url, "content": r.content[:content_chars]}
+            for r in result.get("results", [])
+        ]
+    
+    return {
+        "query": query,
+        "answer": result.get("answer"),
+        "sources": sources,
+    }
 
 
 class WebSearchTool:
-    """Tool interface for web search in the agent system."""
+    """Tool interface for web search in the agent system.
+    
+    Each search has an async ``a``-prefixed variant so independent searches
+    (e.g. product info and competitor prices) can run concurrently.
+    """
     
     def __init__(self):
         self.tavily = TavilySearch()
@@ -206,15 +340,13 @@ class WebSearchTool:
         """
         query = f"{product_name} product specifications reviews"
         result = self.tavily.search_for_context(query, context_type="product")
-        
-        return {
-            "query": query,
-            "answer": result.get("answer"),
-            "sources": [
-                {"title": r.title, "url": r.url, "content": r.content[:300]}
-                for r in result.get("results", [])
-            ],
-        }
+        return _summarize(query, result, content_chars=300)
+    
+    async def asearch_product_info(self, product_name: str) -> dict:
+        """Async variant of search_product_info()."""
+        query = f"{product_name} product specifications reviews"
+        result = await self.tavily.asearch_for_context(query, context_type="product")
+        return _summarize(query, result, content_chars=300)
     
     def search_competitor_prices(self, product_name: str) -> dict:
         """Search for competitor pricing (be careful with this!).
@@ -227,15 +359,24 @@ class WebSearchTool:
         """
         query = f"{product_name} price comparison buy"
         result = self.tavily.search_for_context(query, context_type="product")
+        return _summarize(query, result)
+    
+    async def asearch_competitor_prices(self, product_name: str) -> dict:
+        """Async variant of search_competitor_prices()."""
+        query = f"{product_name} price comparison buy"
+        result = await self.tavily.asearch_for_context(query, context_type="product")
+        return _summarize(query, result)
+    
+    async def asearch_product_and_prices(self, product_name: str) -> tuple[dict, dict]:
+        """Search product information and competitor prices concurrently.
         
-        return {
-            "query": query,
-            "answer": result.get("answer"),
-            "sources": [
-                {"title": r.title, "url": r.url}
-                for r in result.get("results", [])
-            ],
-        }
+        Returns:
+            Tuple of (search_product_info result, search_competitor_prices result)
+        """
+        return tuple(await asyncio.gather(
+            self.asearch_product_info(product_name),
+            self.asearch_competitor_prices(product_name),
+        ))
     
     def search_support_info(self, topic: str) -> dict:
         """Search for support-related information.
@@ -248,15 +389,13 @@ class WebSearchTool:
         """
         query = f"{topic} customer support help guide"
         result = self.tavily.search_for_context(query, context_type="support")
-        
-        return {
-            "query": query,
-            "answer": result.get("answer"),
-            "sources": [
-                {"title": r.title, "url": r.url, "content": r.content[:200]}
-                for r in result.get("results", [])
-            ],
-        }
+        return _summarize(query, result, content_chars=200)
+    
+    async def asearch_support_info(self, topic: str) -> dict:
+        """Async variant of search_support_info()."""
+        query = f"{topic} customer support help guide"
+        result = await self.tavily.asearch_for_context(query, context_type="support")
+        return _summarize(query, result, content_chars=200)
     
     def search_general(self, query: str) -> dict:
         """General web search.
@@ -268,15 +407,12 @@ class WebSearchTool:
             Search results
         """
         result = self.tavily.search_for_context(query, context_type="general")
-        
-        return {
-            "query": query,
-            "answer": result.get("answer"),
-            "sources": [
-                {"title": r.title, "url": r.url, "content": r.content[:300]}
-                for r in result.get("results", [])
-            ],
-        }
+        return _summarize(query, result, content_chars=300)
+    
+    async def asearch_general(self, query: str) -> dict:
+        """Async variant of search_general()."""
+        result = await self.tavily.asearch_for_context(query, context_type="general")
+        return _summarize(query, result, content_chars=300)
 
 
 # Singleton instance
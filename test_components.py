@@ -41,8 +41,15 @@ def test_input_guardrail():
             passed += 1
         print(f"  {status} {name}: {result.action.value}" + (f" (flags: {result.flags})" if result.flags else ""))
     
+    # The same scan feeds keyword routing
+    prescan = ig.check("Where is order ORD-001? I need a refund").metadata["prescan"]
+    routes = [m.payload for m in prescan.of("route")]
+    expected_routes = ["ORDER_AGENT", "ORDER_AGENT", "SUPPORT_AGENT"]
+    status = "✓" if routes == expected_routes else "✗"
+    print(f"  {status} Prescan routes: {routes}")
+    
     print(f"\nPassed: {passed}/{len(test_cases)}")
-    return passed == len(test_cases)
+    return passed == len(test_cases) and routes == expected_routes
 
 
 def test_output_guardrail():
@@ -80,6 +87,23 @@ def test_output_guardrail():
     return passed == len(test_cases)
 
 
+def test_stream_checker():
+    """Test incremental blocked-term detection across chunk boundaries."""
+    print("\n" + "="*60)
+    print("Testing Stream Checker")
+    print("="*60)
+    
+    checker = OutputGuardrail().stream_checker()
+    
+    chunks = ["This is conf", "idential and se", "cret"]
+    hits = [checker.feed(chunk) for chunk in chunks]
+    
+    passed = hits == [[], ["confidential"], ["secret"]]
+    print(f"  {'✓' if passed else '✗'} Split terms detected: {hits}")
+    
+    return passed
+
+
 def test_order_tools():
     """Test order tools functionality."""
     print("\n" + "="*60)
@@ -198,6 +222,29 @@ def test_pipeline_structure():
     return True
 
 
+def test_lfu_cache():
+    """Test LFU cache eviction and statistics."""
+    print("\n" + "="*60)
+    print("Testing LFU Cache")
+    print("="*60)
+    
+    from src.cache import LFUCache
+    
+    cache = LFUCache(capacity=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)  # Evicts "b", the least frequently used
+    
+    passed = "a" in cache and "c" in cache and "b" not in cache
+    print(f"  {'✓' if passed else '✗'} Eviction: keys={sorted(k for k in ('a', 'b', 'c') if k in cache)}")
+    
+    stats = cache.stats()
+    print(f"  ✓ Stats: hits={stats['hits']}, misses={stats['misses']}")
+    
+    return passed
+
+
 def main():
     """Run all tests."""
     print("\n" + "#"*60)
@@ -208,10 +255,12 @@ def main():
     
     all_passed &= test_input_guardrail()
     all_passed &= test_output_guardrail()
+    all_passed &= test_stream_checker()
     all_passed &= test_order_tools()
     all_passed &= test_product_tools()
     all_passed &= test_support_tools()
     all_passed &= test_pipeline_structure()
+    all_passed &= test_lfu_cache()
     
     print("\n" + "="*60)
     if all_passed: